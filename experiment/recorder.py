@@ -0,0 +1,113 @@
+import numpy as np
+
+# --- MOVE CODES ---
+MOVE_NAMES = ("HARVEST", "EXPAND", "CONQUER")
+MOVE_CODES = {name: code for code, name in enumerate(MOVE_NAMES)}
+
+COLUMNS = ["round", "score_a", "score_b", "energy_a", "energy_b", "move_a", "move_b", "nodes_a", "nodes_b"]
+
+def _int_dtype(bound):
+    """Smallest signed dtype that can hold values up to bound."""
+    for dtype in (np.int16, np.int32):
+        if bound <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def _mask_dtype(num_nodes):
+    if num_nodes <= 32:
+        return np.uint32
+    if num_nodes <= 64:
+        return np.uint64
+    return object
+
+class GameRecord:
+    """
+    Columnar per-round metrics backed by preallocated NumPy arrays.
+    Ownership is stored packed as one bitboard per player per round
+    (bit i-1 set = node i owned). Columns are read with record['score_a']
+    and a DataFrame is only built by to_frame().
+    """
+
+    def __init__(self, max_rounds, num_nodes, energy_bound):
+        self.max_rounds = max_rounds
+        self.num_nodes = num_nodes
+        self.length = 0
+
+        count_dtype = _int_dtype(max(max_rounds, num_nodes))
+        energy_dtype = _int_dtype(energy_bound)
+        mask_dtype = _mask_dtype(num_nodes)
+        self.arrays = {
+            "round": np.zeros(max_rounds, dtype=count_dtype),
+            "score_a": np.zeros(max_rounds, dtype=count_dtype),
+            "score_b": np.zeros(max_rounds, dtype=count_dtype),
+            "energy_a": np.zeros(max_rounds, dtype=energy_dtype),
+            "energy_b": np.zeros(max_rounds, dtype=energy_dtype),
+            "move_a": np.zeros(max_rounds, dtype=np.uint8),
+            "move_b": np.zeros(max_rounds, dtype=np.uint8),
+            "owner_a": np.zeros(max_rounds, dtype=mask_dtype),
+            "owner_b": np.zeros(max_rounds, dtype=mask_dtype),
+        }
+
+    @classmethod
+    def for_config(cls, config):
+        """Sizes the arrays for a GAME_CONFIG-style dict."""
+        best_yield = max(config["harvest_home"], config["harvest_power"], config["harvest_normal"])
+        energy_bound = best_yield * config["num_nodes"] * config["max_rounds"]
+        return cls(config["max_rounds"], config["num_nodes"], energy_bound)
+
+    def append(self, round_num, score_a, score_b, energy_a, energy_b, move_a, move_b, owner_a, owner_b):
+        i = self.length
+        arrays = self.arrays
+        arrays["round"][i] = round_num
+        arrays["score_a"][i] = score_a
+        arrays["score_b"][i] = score_b
+        arrays["energy_a"][i] = energy_a
+        arrays["energy_b"][i] = energy_b
+        arrays["move_a"][i] = MOVE_CODES[move_a]
+        arrays["move_b"][i] = MOVE_CODES[move_b]
+        arrays["owner_a"][i] = owner_a
+        arrays["owner_b"][i] = owner_b
+        self.length = i + 1
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, column):
+        """Trimmed view of a raw array column (moves are uint8 codes, see MOVE_NAMES)."""
+        return self.arrays[column][:self.length]
+
+    def move_names(self, player):
+        """Move column for 'a' or 'b' decoded to action names."""
+        return np.asarray(MOVE_NAMES, dtype=object)[self[f"move_{player}"]]
+
+    def nodes(self, player, index):
+        """Sorted node ids owned by 'a' or 'b' after the round at position index."""
+        mask = int(self[f"owner_{player}"][index])
+        return [i + 1 for i in range(self.num_nodes) if mask >> i & 1]
+
+    def owned(self, player):
+        """(rounds, num_nodes) bool matrix unpacked from the ownership column of 'a' or 'b'."""
+        shifts = np.arange(self.num_nodes, dtype=np.uint64)
+        return ((self[f"owner_{player}"].astype(np.uint64)[:, None] >> shifts) & 1).astype(bool)
+
+    def node_lists(self, player):
+        """Per-round sorted node id lists for 'a' or 'b' (the legacy nodes_* column)."""
+        ids = np.arange(1, self.num_nodes + 1)
+        return [ids[row].tolist() for row in self.owned(player)]
+
+    def ownership_matrix(self):
+        """(num_nodes, rounds) int8 matrix: 1 = owned by A, -1 = owned by B, 0 = free."""
+        return (self.owned("a").astype(np.int8) - self.owned("b").astype(np.int8)).T
+
+    def to_frame(self):
+        """Materialises the legacy metrics DataFrame (one row per round)."""
+        import pandas as pd
+
+        data = {}
+        for column in ("round", "score_a", "score_b", "energy_a", "energy_b"):
+            data[column] = self[column].astype(np.int64)
+        data["move_a"] = self.move_names("a")
+        data["move_b"] = self.move_names("b")
+        data["nodes_a"] = self.node_lists("a")
+        data["nodes_b"] = self.node_lists("b")
+        return pd.DataFrame(data, columns=COLUMNS)
@@ -4,6 +4,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from matplotlib.colors import LinearSegmentedColormap
 from config import GAME_CONFIG
+from recorder import GameRecord, MOVE_NAMES
 
 class GameSimRecorded:
     def __init__(self, strat_a, strat_b, config=GAME_CONFIG):
@@ -18,12 +19,7 @@ class GameSimRecorded:
         self.nodes[self.config["home_b"]] = 'B'
         
         # Metrics Log
-        self.metrics = {
-            "round": [], "score_a": [], "score_b": [],
-            "energy_a": [], "energy_b": [],
-            "move_a": [], "move_b": [],
-            "nodes_a": [], "nodes_b": []
-        }
+        self.record = GameRecord.for_config(self.config)
 
     def get_neighbors(self, node_id):
         n = self.config["num_nodes"]
@@ -150,22 +146,24 @@ class GameSimRecorded:
                 self.energy[p] -= total_cost
 
         # 5. Record state
-        self.metrics["round"].append(round_num)
-        self.metrics["score_a"].append(len([v for v in self.nodes.values() if v == 'A']))
-        self.metrics["score_b"].append(len([v for v in self.nodes.values() if v == 'B']))
-        self.metrics["energy_a"].append(self.energy['A'])
-        self.metrics["energy_b"].append(self.energy['B'])
-        self.metrics["move_a"].append(move_a[0])
-        self.metrics["move_b"].append(move_b[0])
-        self.metrics["nodes_a"].append([k for k, v in self.nodes.items() if v == 'A'])
-        self.metrics["nodes_b"].append([k for k, v in self.nodes.items() if v == 'B'])
-
-    def play_game(self):
+        owner_a = sum(1 << (k - 1) for k, v in self.nodes.items() if v == 'A')
+        owner_b = sum(1 << (k - 1) for k, v in self.nodes.items() if v == 'B')
+        self.record.append(
+            round_num, owner_a.bit_count(), owner_b.bit_count(),
+            self.energy['A'], self.energy['B'], move_a[0], move_b[0],
+            owner_a, owner_b
+        )
+
+    def play_recorded(self):
         for r in range(1, self.config["max_rounds"] + 1):
             self.run_round(r)
-        return pd.DataFrame(self.metrics)
+        return self.record
+
+    def play_game(self):
+        return self.play_recorded().to_frame()
 
-def plot_game_analysis(df, name_a, name_b, config=GAME_CONFIG):
+def plot_game_analysis(record, name_a, name_b, config=GAME_CONFIG):
+    """Plots a GameRecord straight from its arrays (see GameSimRecorded.play_recorded)."""
     plt.style.use('seaborn-v0_8-darkgrid')
     fig = plt.figure(figsize=(18, 12))
     grid = plt.GridSpec(3, 2, hspace=0.3, wspace=0.2)
@@ -173,8 +171,11 @@ def plot_game_analysis(df, name_a, name_b, config=GAME_CONFIG):
 
     # 1. Territory Stacked Plot
     ax1 = fig.add_subplot(grid[0, :])
-    empty = config["num_nodes"] - (df['score_a'] + df['score_b'])
-    ax1.stackplot(df['round'], df['score_a'], empty, df['score_b'], 
+    rounds = record['round']
+    score_a = record['score_a'].astype(np.int64)
+    score_b = record['score_b'].astype(np.int64)
+    empty = config["num_nodes"] - (score_a + score_b)
+    ax1.stackplot(rounds, score_a, empty, score_b, 
                   labels=[f"{name_a}", "Empty", f"{name_b}"],
                   colors=[col_a, col_neut, col_b], alpha=0.8)
     ax1.set_title("Territory Control Over Time", weight='bold', size=14)
@@ -183,17 +184,17 @@ def plot_game_analysis(df, name_a, name_b, config=GAME_CONFIG):
 
     # 2. Energy Economy
     ax2 = fig.add_subplot(grid[1, 0])
-    ax2.plot(df['round'], df['energy_a'], color=col_a, label=name_a, lw=2)
-    ax2.plot(df['round'], df['energy_b'], color=col_b, label=name_b, lw=2, ls='--')
+    ax2.plot(rounds, record['energy_a'], color=col_a, label=name_a, lw=2)
+    ax2.plot(rounds, record['energy_b'], color=col_b, label=name_b, lw=2, ls='--')
     ax2.set_title("Energy Reserves", weight='bold')
     ax2.legend()
 
     # 3. Action Distribution
     ax3 = fig.add_subplot(grid[1, 1])
     # Ensure all actions appear in the plot even if not used
-    possible = ["HARVEST", "EXPAND", "CONQUER"]
-    vals_a = [df['move_a'].value_counts().get(act, 0) for act in possible]
-    vals_b = [df['move_b'].value_counts().get(act, 0) for act in possible]
+    possible = list(MOVE_NAMES)
+    vals_a = np.bincount(record['move_a'], minlength=len(possible))
+    vals_b = np.bincount(record['move_b'], minlength=len(possible))
     x = np.arange(len(possible))
     ax3.bar(x - 0.175, vals_a, 0.35, label=name_a, color=col_a)
     ax3.bar(x + 0.175, vals_b, 0.35, label=name_b, color=col_b)
@@ -202,11 +203,8 @@ def plot_game_analysis(df, name_a, name_b, config=GAME_CONFIG):
 
     # 4. Spatial Heatmap
     ax4 = fig.add_subplot(grid[2, :])
-    # Dynamic matrix sizing
-    matrix = np.zeros((config["num_nodes"], len(df)))
-    for r_idx, row in df.iterrows():
-        for n in row['nodes_a']: matrix[n-1, r_idx] = 1 
-        for n in row['nodes_b']: matrix[n-1, r_idx] = -1
+    # Dynamic matrix sizing (decoded from the packed ownership columns)
+    matrix = record.ownership_matrix()
     
     cmap = LinearSegmentedColormap.from_list("game_map", [col_b, "#f0f0f0", col_a], N=3)
     sns.heatmap(matrix, ax=ax4, cmap=cmap, cbar=False, linewidths=0.1, linecolor='#eeeeee')
@@ -228,5 +226,5 @@ def plot_game_analysis(df, name_a, name_b, config=GAME_CONFIG):
 if __name__ == "__main__":
     from strategies import strat_sniper, strat_hoarder
     sim = GameSimRecorded(strat_sniper, strat_hoarder)
-    data = sim.play_game()
+    data = sim.play_recorded()
     # plot_game_analysis(data, "Sniper", "Hoarder")
\ No newline at end of file
@@ -0,0 +1,360 @@
+import numpy as np
+from dataclasses import dataclass
+from config import GAME_CONFIG
+from rules import compile_rules
+from recorder import MOVE_CODES
+from sim import NodeView
+
+# --- ACTION CODES (shared with recorder.MOVE_CODES) ---
+HARVEST = MOVE_CODES["HARVEST"]
+EXPAND = MOVE_CODES["EXPAND"]
+CONQUER = MOVE_CODES["CONQUER"]
+INVALID = 255
+
+# Owner codes in the (games, nodes) ownership array
+FREE, OWNER_A, OWNER_B = 0, 1, 2
+
+# --- DATA STRUCTURES ---
+@dataclass
+class BatchResult:
+    """Final per-game arrays of a batch, each shaped (games,)."""
+    score_a: np.ndarray
+    score_b: np.ndarray
+    energy_a: np.ndarray
+    energy_b: np.ndarray
+    invalid_a: np.ndarray
+    invalid_b: np.ndarray
+
+# --- STRATEGY ADAPTERS ---
+# A vectorized strategy is called as strat(free, opp, mine, energy, rng) where
+# free/opp/mine are bool arrays shaped (games, nodes) (column j is node j + 1)
+# and energy is shaped (games,). It returns (actions, targets): action codes
+# and 1-based target node ids (ignored for HARVEST), both shaped (games,).
+def vectorized(func):
+    """Marks a function as a vectorized strategy."""
+    func.vectorized = True
+    return func
+
+class ScalarStrategy:
+    """
+    Runs an ordinary (free, opp, mine, energy) strategy game by game while the
+    engine stays vectorized. Moves are encoded with the same acceptance rules
+    as GameSimRecorded.validate_move; malformed moves become INVALID.
+    """
+    vectorized = True
+
+    def __init__(self, func, config=GAME_CONFIG):
+        self.func = func
+        self.node_ids = compile_rules(config).node_ids
+
+    def encode(self, move):
+        if not move or not isinstance(move, list):
+            return INVALID, 0
+        action = move[0]
+        if action == "HARVEST":
+            return HARVEST, 0
+        if action != "EXPAND" and action != "CONQUER":
+            return INVALID, 0
+        try:
+            node = self.node_ids.get(move[1])
+        except (IndexError, TypeError):
+            return INVALID, 0
+        if node is None:
+            return INVALID, 0
+        return MOVE_CODES[action], node
+
+    def __call__(self, free, opp, mine, energy, rng):
+        games = len(energy)
+        actions = np.empty(games, dtype=np.uint8)
+        targets = np.zeros(games, dtype=np.int64)
+        node_ids = np.arange(1, free.shape[1] + 1)
+        for g in range(games):
+            move = self.func(
+                NodeView(node_ids[free[g]].tolist()),
+                NodeView(node_ids[opp[g]].tolist()),
+                NodeView(node_ids[mine[g]].tolist()),
+                int(energy[g])
+            )
+            actions[g], targets[g] = self.encode(move)
+        return actions, targets
+
+# --- BATCH ENGINE ---
+class BatchGameSim:
+    """
+    Plays `games` independent matches of strat_a vs strat_b at once.
+    Ownership is an int8 array shaped (games, num_nodes + 1) (column 0 is
+    padding so node ids index it directly) and energy is shaped (games, 2).
+    Resolution follows GameSimRecorded exactly: both moves are validated
+    against the start-of-round board, collisions are settled first, then
+    A's and B's remaining actions are applied in that order.
+    Plain scalar strategies are wrapped in ScalarStrategy automatically.
+    """
+
+    def __init__(self, strat_a, strat_b, games, config=GAME_CONFIG, seed=None):
+        self.rules = compile_rules(config)
+        self.strat_a = strat_a if getattr(strat_a, "vectorized", False) else ScalarStrategy(strat_a, config)
+        self.strat_b = strat_b if getattr(strat_b, "vectorized", False) else ScalarStrategy(strat_b, config)
+        self.games = games
+        self.rng = np.random.default_rng(seed)
+
+        # Rules Tables (indexed by node id, row/column 0 is padding)
+        rules = self.rules
+        self.expand_cost = np.array(rules.expand_cost, dtype=np.int64)
+        self.conquer_cost = np.array(rules.conquer_cost, dtype=np.int64)
+        self.neighbors = np.array([(0, 0)] + list(rules.neighbors[1:]), dtype=np.int64)
+        self.harvest_yield = {
+            OWNER_A: np.array(rules.harvest_yield['A'][1:], dtype=np.int64),
+            OWNER_B: np.array(rules.harvest_yield['B'][1:], dtype=np.int64)
+        }
+        self.protected = np.zeros(rules.num_nodes + 1, dtype=bool)
+        self.protected[[rules.home['A'], rules.home['B']]] = True
+
+        # Initialize State
+        self.owner = np.zeros((games, rules.num_nodes + 1), dtype=np.int8)
+        self.owner[:, rules.home['A']] = OWNER_A
+        self.owner[:, rules.home['B']] = OWNER_B
+        self.energy = np.zeros((games, 2), dtype=np.int64)
+        self.invalid = np.zeros((games, 2), dtype=np.int64)
+        self.rows = np.arange(games)
+
+    def income(self, player):
+        return (self.owner[:, 1:] == player).astype(np.int64) @ self.harvest_yield[player]
+
+    def defense(self, targets, defender, rows=None):
+        """Defence bonus of each target node against `defender`, computed from the current board."""
+        rows = self.rows if rows is None else rows
+        owned = self.owner[rows[:, None], self.neighbors[targets]] == defender
+        return owned.sum(axis=1) * self.rules.defense_bonus
+
+    def validate(self, actions, targets, player, energy):
+        """Returns (actions, targets) with every illegal move replaced by HARVEST."""
+        opp = OWNER_B if player == OWNER_A else OWNER_A
+        in_range = (targets >= 1) & (targets <= self.rules.num_nodes)
+        nodes = np.where(in_range, targets, 0)
+        cell = self.owner[self.rows, nodes]
+
+        expand_ok = (actions == EXPAND) & in_range & (cell == FREE) & (energy >= self.expand_cost[nodes])
+        conquer_ok = (
+            (actions == CONQUER) & in_range & (cell == opp) & ~self.protected[nodes]
+            & (energy >= self.conquer_cost[nodes] + self.defense(nodes, opp))
+        )
+        valid = (actions == HARVEST) | expand_ok | conquer_ok
+        self.invalid[:, player - 1] += ~valid
+        actions = np.where(valid, actions, HARVEST).astype(np.uint8)
+        return actions, np.where(actions != HARVEST, nodes, 0)
+
+    def apply(self, player, actions, targets, skip):
+        idx = player - 1
+        opp = OWNER_B if player == OWNER_A else OWNER_A
+
+        harvest = (actions == HARVEST) & ~skip
+        if harvest.any():
+            self.energy[harvest, idx] += self.income(player)[harvest]
+
+        rows = np.flatnonzero((actions == EXPAND) & ~skip)
+        if rows.size:
+            nodes = targets[rows]
+            self.owner[rows, nodes] = player
+            self.energy[rows, idx] -= self.expand_cost[nodes]
+
+        rows = np.flatnonzero((actions == CONQUER) & ~skip)
+        if rows.size:
+            nodes = targets[rows]
+            cost = self.conquer_cost[nodes] + self.defense(nodes, opp, rows)
+            self.owner[rows, nodes] = player
+            self.energy[rows, idx] -= cost
+
+    def resolve_collisions(self, act_a, tgt_a, act_b, tgt_b):
+        collided = (act_a == EXPAND) & (act_b == EXPAND) & (tgt_a == tgt_b)
+        if not collided.any():
+            return collided
+
+        energy_a = self.energy[:, 0].copy()
+        energy_b = self.energy[:, 1].copy()
+        cost = self.expand_cost[tgt_a]
+        penalty = self.rules.collision_penalty
+        a_wins = collided & (energy_a > energy_b)
+        b_wins = collided & (energy_b > energy_a)
+        tie = collided & (energy_a == energy_b)
+
+        self.owner[a_wins, tgt_a[a_wins]] = OWNER_A
+        self.owner[b_wins, tgt_a[b_wins]] = OWNER_B
+        self.energy[:, 0] = np.where(a_wins, energy_a - cost, np.where(b_wins | tie, np.maximum(0, energy_a - penalty), energy_a))
+        self.energy[:, 1] = np.where(b_wins, energy_b - cost, np.where(a_wins | tie, np.maximum(0, energy_b - penalty), energy_b))
+        return collided
+
+    def run_round(self):
+        board = self.owner[:, 1:]
+        free = board == FREE
+        owned_a = board == OWNER_A
+        owned_b = board == OWNER_B
+        energy_a = self.energy[:, 0].copy()
+        energy_b = self.energy[:, 1].copy()
+
+        act_a, tgt_a = self.strat_a(free, owned_b, owned_a, energy_a, self.rng)
+        act_b, tgt_b = self.strat_b(free, owned_a, owned_b, energy_b, self.rng)
+        act_a, tgt_a = self.validate(np.asarray(act_a), np.asarray(tgt_a, dtype=np.int64), OWNER_A, energy_a)
+        act_b, tgt_b = self.validate(np.asarray(act_b), np.asarray(tgt_b, dtype=np.int64), OWNER_B, energy_b)
+
+        collided = self.resolve_collisions(act_a, tgt_a, act_b, tgt_b)
+        self.apply(OWNER_A, act_a, tgt_a, collided)
+        self.apply(OWNER_B, act_b, tgt_b, collided)
+
+    def play(self) -> BatchResult:
+        for _ in range(self.rules.max_rounds):
+            self.run_round()
+        board = self.owner[:, 1:]
+        return BatchResult(
+            score_a=(board == OWNER_A).sum(axis=1),
+            score_b=(board == OWNER_B).sum(axis=1),
+            energy_a=self.energy[:, 0].copy(),
+            energy_b=self.energy[:, 1].copy(),
+            invalid_a=self.invalid[:, 0].copy(),
+            invalid_b=self.invalid[:, 1].copy()
+        )
+
+# --- VECTORIZED BUILT-IN STRATEGIES ---
+# Array equivalents of strategies.py. Like the originals they assume the
+# default map: power nodes [4, 7, 11, 17, 20, 24] and homes 1 and 14.
+POWER_NODES = [4, 7, 11, 17, 20, 24]
+HOME_NODES = [1, 14]
+
+def _node_mask(nodes, num_nodes):
+    mask = np.zeros(num_nodes, dtype=bool)
+    mask[[n - 1 for n in nodes if n <= num_nodes]] = True
+    return mask
+
+def _first(mask):
+    """Node id of the lowest set column per game (0 where the row is empty)."""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1) + 1, 0)
+
+def _last(mask):
+    """Node id of the highest set column per game (0 where the row is empty)."""
+    return np.where(mask.any(axis=1), mask.shape[1] - mask[:, ::-1].argmax(axis=1), 0)
+
+def _choice(mask, rng):
+    """Uniformly random set column per game, as a node id (0 where the row is empty)."""
+    counts = mask.sum(axis=1)
+    picks = np.floor(rng.random(len(mask)) * counts).astype(np.int64)
+    ranks = np.cumsum(mask, axis=1) - 1
+    hit = mask & (ranks == picks[:, None])
+    return np.where(counts > 0, hit.argmax(axis=1) + 1, 0)
+
+def _neighbor_count(mask):
+    """Per-node count of ring neighbours (previous and next) set in mask."""
+    counts = mask.astype(np.int64)
+    return np.roll(counts, 1, axis=1) + np.roll(counts, -1, axis=1)
+
+class _Decision:
+    """Accumulates first-match-wins decisions, mirroring early returns."""
+
+    def __init__(self, games):
+        self.actions = np.full(games, HARVEST, dtype=np.uint8)
+        self.targets = np.zeros(games, dtype=np.int64)
+        self.open = np.ones(games, dtype=bool)
+
+    def take(self, cond, action, targets):
+        hit = self.open & cond
+        self.actions[hit] = action
+        self.targets[hit] = targets[hit] if np.ndim(targets) else targets
+        self.open &= ~hit
+
+    def stop(self, cond):
+        """Games matching cond return HARVEST."""
+        self.open &= ~cond
+
+    def result(self):
+        return self.actions, self.targets
+
+@vectorized
+def vec_random(free, opp, mine, energy, rng):
+    power = _node_mask(POWER_NODES, free.shape[1])
+    valid_opp = opp & ~_node_mask(HOME_NODES, free.shape[1])
+    d = _Decision(len(energy))
+
+    has_free = free.any(axis=1)
+    possible = (free & power & (energy >= 16)[:, None]) | (free & ~power & (energy >= 5)[:, None])
+    d.take(has_free & (energy >= 5) & possible.any(axis=1), EXPAND, _choice(possible, rng))
+
+    base = np.where(power, 20, 8)
+    affordable = valid_opp & (energy[:, None] >= base + 1)
+    d.take(~has_free & affordable.any(axis=1), CONQUER, _choice(affordable, rng))
+    return d.result()
+
+@vectorized
+def vec_power_rush(free, opp, mine, energy, rng):
+    power = _node_mask(POWER_NODES, free.shape[1])
+    valid_opp = opp & ~_node_mask(HOME_NODES, free.shape[1])
+    d = _Decision(len(energy))
+
+    free_power = free & power
+    has_free_power = free_power.any(axis=1)
+    d.take(has_free_power & (energy >= 16), EXPAND, _choice(free_power, rng))
+    normal = free & ~power
+    d.take(
+        has_free_power & (energy >= 5) & (energy < 15) & (free_power.sum(axis=1) > 2) & normal.any(axis=1),
+        EXPAND, _choice(normal, rng)
+    )
+    d.stop(has_free_power)
+
+    d.take(free.any(axis=1) & (energy >= 5), EXPAND, _first(free))
+    opp_power = valid_opp & power
+    d.take(opp_power.any(axis=1) & (energy >= 25), CONQUER, _first(opp_power))
+    return d.result()
+
+@vectorized
+def vec_hoarder(free, opp, mine, energy, rng):
+    power = _node_mask(POWER_NODES, free.shape[1])
+    valid_opp = opp & ~_node_mask(HOME_NODES, free.shape[1])
+    d = _Decision(len(energy))
+
+    free_power = free & power
+    d.take(
+        (energy >= 16) & free.any(axis=1), EXPAND,
+        np.where(free_power.any(axis=1), _first(free_power), _first(free))
+    )
+    normal = free & ~power
+    d.take((energy >= 6) & (energy < 15) & normal.any(axis=1), EXPAND, _first(normal))
+    d.take((energy > 30) & valid_opp.any(axis=1), CONQUER, _first(valid_opp))
+    return d.result()
+
+@vectorized
+def vec_neighbor(free, opp, mine, energy, rng):
+    power = _node_mask(POWER_NODES, free.shape[1])
+    d = _Decision(len(energy))
+
+    my_neighbors = np.where(free, _neighbor_count(mine), 0)
+    high_value = (my_neighbors > 0) & power
+    pocket = (my_neighbors == 2) & ~power
+    single = (my_neighbors == 1) & ~power
+    d.take(high_value.any(axis=1) & (energy >= 16), EXPAND, _first(high_value))
+    # Pockets are inserted at the front of the list, so the highest one wins
+    d.take(pocket.any(axis=1) & (energy >= 5), EXPAND, _last(pocket))
+    d.take(single.any(axis=1) & (energy >= 5), EXPAND, _first(single))
+    d.take(free.any(axis=1) & (energy >= 5) & ~mine.any(axis=1), EXPAND, _choice(free, rng))
+    return d.result()
+
+@vectorized
+def vec_sniper(free, opp, mine, energy, rng):
+    power = _node_mask(POWER_NODES, free.shape[1])
+    valid_opp = opp & ~_node_mask(HOME_NODES, free.shape[1])
+    d = _Decision(len(energy))
+
+    isolated = valid_opp & (_neighbor_count(opp) == 0) & ~power
+    d.take(valid_opp.any(axis=1) & (energy >= 10) & isolated.any(axis=1), CONQUER, _first(isolated))
+    opp_power = valid_opp & power
+    d.take(opp_power.any(axis=1) & (energy >= 25), CONQUER, _first(opp_power))
+    d.take(free.any(axis=1) & (energy >= 5), EXPAND, _first(free))
+    return d.result()
+
+def vectorize(func):
+    """Vectorized equivalent of a built-in strategy, or a ScalarStrategy adapter for anything else."""
+    import strategies
+    builtins = {
+        strategies.strat_random: vec_random,
+        strategies.strat_power_rush: vec_power_rush,
+        strategies.strat_hoarder: vec_hoarder,
+        strategies.strat_neighbor: vec_neighbor,
+        strategies.strat_sniper: vec_sniper,
+    }
+    return builtins.get(func) or ScalarStrategy(func)
@@ -0,0 +1,149 @@
+import time
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+COLLECTION_TOURNAMENT_STATE = "tournament_state"
+LEAGUE_LEASE_DOC = "league"
+
+class Coalescer(ABC):
+    """
+    Collapses bursts of tournament triggers into a single league run.
+
+    Every trigger bumps a shared generation counter and remembers the value
+    it got. It then waits `debounce_sec`; if another trigger bumped the
+    counter meanwhile, this one is superseded and should exit, leaving the
+    newest trigger to run the league over the latest snapshot. A run that is
+    already in progress polls the counter (at most every `poll_interval`
+    seconds) and aborts as soon as a newer generation appears.
+
+    So that a steady stream of triggers cannot defer the leaderboard forever,
+    every `max_pending`-th trigger since the last finished league (see
+    finish()) is forced: it runs and completes even if superseded.
+    Backends only provide _bump(), _current(), _completed() and _complete().
+    """
+
+    def __init__(self, debounce_sec=30.0, poll_interval=5.0, max_pending=10, clock=time.monotonic, sleep=time.sleep):
+        self.debounce_sec = debounce_sec
+        self.poll_interval = poll_interval
+        self.max_pending = max_pending
+        self.clock = clock
+        self.sleep = sleep
+        self.forced = False
+        self._last_poll = None
+        self._last_seen = None
+
+    @abstractmethod
+    def _bump(self) -> int:
+        """Increments the shared generation counter and returns the new value."""
+
+    @abstractmethod
+    def _current(self) -> int:
+        """Current value of the shared generation counter."""
+
+    @abstractmethod
+    def _completed(self) -> int:
+        """Newest generation whose league has finished (0 if none)."""
+
+    @abstractmethod
+    def _complete(self, generation) -> None:
+        """Raises the finished generation to `generation` (never lowers it)."""
+
+    def begin(self) -> int:
+        """Registers a trigger and returns its generation."""
+        generation = self._bump()
+        self._last_poll = self.clock()
+        self._last_seen = generation
+        return generation
+
+    def superseded(self, generation, force=False) -> bool:
+        """True once a newer trigger exists (never for a forced run). Reads are throttled unless force=True."""
+        if self.forced:
+            return False
+        now = self.clock()
+        if force or self._last_poll is None or now - self._last_poll >= self.poll_interval:
+            self._last_seen = self._current()
+            self._last_poll = now
+        return self._last_seen != generation
+
+    def settle(self, generation) -> bool:
+        """Waits out the debounce window. Returns False if this trigger was superseded and is not forced."""
+        if self.debounce_sec > 0:
+            self.sleep(self.debounce_sec)
+        pending = generation - self._completed()
+        self.forced = self.max_pending > 0 and pending >= self.max_pending and pending % self.max_pending == 0
+        return not self.superseded(generation, force=True)
+
+    def finish(self, generation) -> None:
+        """Marks the league of this trigger as finished (the leaderboard is up to date with it)."""
+        self._complete(generation)
+
+    def abort_check(self, generation):
+        """Callable for run_league(should_abort=...)."""
+        return lambda: self.superseded(generation)
+
+class FirestoreCoalescer(Coalescer):
+    """Generation counter stored in tournament_state/league, bumped in a transaction."""
+
+    def __init__(self, db, **kwargs):
+        super().__init__(**kwargs)
+        self.db = db
+        self.doc_ref = db.collection(COLLECTION_TOURNAMENT_STATE).document(LEAGUE_LEASE_DOC)
+
+    def _bump(self) -> int:
+        from google.cloud import firestore
+
+        @firestore.transactional
+        def bump(transaction):
+            snap = self.doc_ref.get(transaction=transaction)
+            generation = (snap.to_dict() or {}).get("generation", 0) + 1 if snap.exists else 1
+            transaction.set(self.doc_ref, {
+                "generation": generation,
+                "updatedAt": datetime.now(timezone.utc)
+            }, merge=True)
+            return generation
+
+        return bump(self.db.transaction())
+
+    def _current(self) -> int:
+        snap = self.doc_ref.get()
+        return (snap.to_dict() or {}).get("generation", 0) if snap.exists else 0
+
+    def _completed(self) -> int:
+        snap = self.doc_ref.get()
+        return (snap.to_dict() or {}).get("completed", 0) if snap.exists else 0
+
+    def _complete(self, generation) -> None:
+        from google.cloud import firestore
+
+        @firestore.transactional
+        def complete(transaction):
+            snap = self.doc_ref.get(transaction=transaction)
+            if (snap.to_dict() or {}).get("completed", 0) < generation:
+                transaction.set(self.doc_ref, {"completed": generation}, merge=True)
+
+        complete(self.db.transaction())
+
+class InMemoryCoalescer(Coalescer):
+    """Process-local stand-in for tests and local runs. Instances sharing `state` coalesce together."""
+
+    def __init__(self, state=None, **kwargs):
+        super().__init__(**kwargs)
+        self.state = state if state is not None else {"generation": 0, "completed": 0, "lock": threading.Lock()}
+
+    def _bump(self) -> int:
+        with self.state["lock"]:
+            self.state["generation"] += 1
+            return self.state["generation"]
+
+    def _current(self) -> int:
+        with self.state["lock"]:
+            return self.state["generation"]
+
+    def _completed(self) -> int:
+        with self.state["lock"]:
+            return self.state["completed"]
+
+    def _complete(self, generation) -> None:
+        with self.state["lock"]:
+            self.state["completed"] = max(self.state["completed"], generation)
@@ -0,0 +1,64 @@
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+COLLECTION_DRAFT_EVALUATIONS = "draft_evaluations"
+
+# --- KEYS ---
+def evaluation_key(signature: str, rules_digest: str, gauntlet_digest: str) -> str:
+    """Cache key of a draft evaluation: (behavioural signature, ruleset hash, system bot code)."""
+    return hashlib.sha256(f"{signature}:{rules_digest}:{gauntlet_digest}".encode()).hexdigest()
+
+def evaluation_record(strategy_name: str, tournament_result: Dict[str, Dict]) -> Dict:
+    """The leaderboard of an evaluated draft and the name the candidate played under."""
+    return {"strategy_name": strategy_name, "tournament_result": tournament_result}
+
+def renamed_result(record: Dict, strategy_name: str) -> Dict[str, Dict]:
+    """The cached leaderboard with the candidate's row moved to strategy_name."""
+    old_name = record["strategy_name"]
+    result = {}
+    for name, stats in record["tournament_result"].items():
+        if name == old_name:
+            name = strategy_name
+            stats = {**stats, "strategy": strategy_name}
+        result[name] = stats
+    return result
+
+# --- LOCAL BACKEND ---
+class LocalDraftCache:
+    """Draft evaluations kept in a single JSON file on disk (in memory only when path is None)."""
+
+    def __init__(self, path="draft_evaluations.json"):
+        self.path = path
+        self.records = {}
+        if path is not None and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.records = json.load(f)
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.records.get(key)
+
+    def put(self, key: str, record: Dict) -> None:
+        self.records[key] = record
+        if self.path is None:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.records, f)
+        os.replace(tmp_path, self.path)
+
+# --- FIRESTORE BACKEND ---
+class FirestoreDraftCache:
+    """Draft evaluations kept as one document per key in 'draft_evaluations'."""
+
+    def __init__(self, db):
+        self.collection = db.collection(COLLECTION_DRAFT_EVALUATIONS)
+
+    def get(self, key: str) -> Optional[Dict]:
+        snap = self.collection.document(key).get()
+        return snap.to_dict() if snap.exists else None
+
+    def put(self, key: str, record: Dict) -> None:
+        self.collection.document(key).set({**record, "updatedAt": datetime.now(timezone.utc)})
@@ -0,0 +1,176 @@
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+COLLECTION_DRAFT_JOBS = "draft_jobs"
+
+# Job lifecycle: queued -> running -> succeeded | failed
+# While running, `stage` names the most recently finished stage and
+# `stages` maps every finished stage to its completion time.
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+
+# A claim holds the job until leaseUntil; longer than the function timeout
+# (540 s), so an expired lease means the worker that claimed it died
+JOB_LEASE_SEC = float(os.environ.get("DRAFT_JOB_LEASE_SEC", "600"))
+
+def _now():
+    return datetime.now(timezone.utc)
+
+def lease_expired(job: Dict, now: Optional[datetime] = None) -> bool:
+    """True for a running job whose worker crashed or timed out before finishing it."""
+    lease = job.get("leaseUntil")
+    return job.get("status") == STATUS_RUNNING and lease is not None and lease <= (now or _now())
+
+def _claimable(job: Optional[Dict], now: datetime) -> bool:
+    return bool(job) and (job.get("status") == STATUS_QUEUED or lease_expired(job, now))
+
+def new_job(params: Dict) -> Dict:
+    now = _now()
+    return {
+        "status": STATUS_QUEUED,
+        "stage": None,
+        "stages": {},
+        "params": params,
+        "team_name": params.get("team_name"),
+        "draft_id": params.get("draft_id"),
+        "result": None,
+        "error": None,
+        "leaseUntil": None,
+        "createdAt": now,
+        "updatedAt": now,
+    }
+
+# --- FIRESTORE BACKEND ---
+class FirestoreJobStore:
+    """One document per job in 'draft_jobs'. Creating it fires the worker trigger."""
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.collection(COLLECTION_DRAFT_JOBS)
+
+    def create(self, params: Dict) -> str:
+        ref = self.collection.document()
+        ref.set(new_job(params))
+        return ref.id
+
+    def update(self, job_id: str, fields: Dict) -> None:
+        # Dotted keys ("stages.validate") update nested fields
+        self.collection.document(job_id).update({**fields, "updatedAt": _now()})
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        snap = self.collection.document(job_id).get()
+        return snap.to_dict() if snap.exists else None
+
+    def claim(self, job_id: str) -> Optional[Dict]:
+        """
+        Moves a queued job (or one whose lease expired) to running in a
+        transaction and returns it, or None if it is missing, finished or
+        still held by an earlier delivery of the trigger.
+        """
+        from google.cloud import firestore
+
+        ref = self.collection.document(job_id)
+
+        @firestore.transactional
+        def claim(transaction):
+            snap = ref.get(transaction=transaction)
+            job = snap.to_dict() if snap.exists else None
+            now = _now()
+            if not _claimable(job, now):
+                return None
+            lease = {"status": STATUS_RUNNING, "leaseUntil": now + timedelta(seconds=JOB_LEASE_SEC), "updatedAt": now}
+            transaction.update(ref, lease)
+            return {**job, **lease}
+
+        return claim(self.db.transaction())
+
+# --- IN-MEMORY BACKEND ---
+class InMemoryJobStore:
+    """Process-local job documents for tests and local runs."""
+
+    def __init__(self):
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def create(self, params: Dict) -> str:
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.jobs[job_id] = new_job(params)
+        return job_id
+
+    def update(self, job_id: str, fields: Dict) -> None:
+        with self.lock:
+            job = self.jobs[job_id]
+            for key, value in {**fields, "updatedAt": _now()}.items():
+                *parents, leaf = key.split(".")
+                target = job
+                for part in parents:
+                    target = target.setdefault(part, {})
+                target[leaf] = value
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return {**job, "stages": dict(job["stages"])}
+
+    def claim(self, job_id: str) -> Optional[Dict]:
+        """Moves a queued (or lease-expired) job to running and returns it; None otherwise."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            now = _now()
+            if not _claimable(job, now):
+                return None
+            job["status"] = STATUS_RUNNING
+            job["leaseUntil"] = now + timedelta(seconds=JOB_LEASE_SEC)
+            job["updatedAt"] = now
+            return {**job, "stages": dict(job["stages"])}
+
+# --- QUEUES ---
+class FirestoreJobQueue:
+    """Enqueueing is just writing the job document; the on-create trigger runs it."""
+
+    def __init__(self, store: FirestoreJobStore):
+        self.store = store
+
+    def enqueue(self, params: Dict) -> str:
+        return self.store.create(params)
+
+class InProcessJobQueue:
+    """
+    Stand-in for the Firestore trigger: a daemon thread pops job ids and
+    calls handler(store, job_id, params) one job at a time.
+    """
+
+    def __init__(self, store, handler: Callable[[object, str, Dict], None]):
+        self.store = store
+        self.handler = handler
+        self.pending = queue.Queue()
+        self.worker = threading.Thread(target=self._work, name="draft-jobs", daemon=True)
+        self.worker.start()
+
+    def _work(self):
+        while True:
+            job_id, params = self.pending.get()
+            try:
+                self.handler(self.store, job_id, params)
+            except Exception as e:
+                print(f"[ERROR] Draft job {job_id} crashed: {e}")
+            finally:
+                self.pending.task_done()
+
+    def enqueue(self, params: Dict) -> str:
+        job_id = self.store.create(params)
+        self.pending.put((job_id, params))
+        return job_id
+
+    def join(self):
+        """Blocks until every enqueued job has finished."""
+        self.pending.join()
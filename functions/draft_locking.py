@@ -7,7 +7,11 @@ from firebase_functions.options import MemoryOption
 
 # Internal Imports
 from loader import load_strategy_from_code
-from signature_check import generate_strategy_signature
+from signature_check import generate_strategy_signature, signature_version, SIGNATURE_VERSION
+from signature_index import get_signature_index
+from similarity import fingerprint, FINGERPRINT_VERSION
+from match_store import code_hash
+from rules import compile_rules
 
 # Initialize App
 try:
@@ -15,22 +19,51 @@ try:
 except ValueError:
     app = initialize_app()
 
-def get_unique_strategy_name(db, base_name: str) -> str:
+# Collisions resolved with the '_o' suffix before falling back to a timestamp
+MAX_NAME_SUFFIXES = 10
+
+def pick_unique_name(base_name: str, taken) -> str:
     """
-    Checks if 'base_name' exists in 'strategies' collection.
-    If it exists, appends '_o' recursively until a unique name is found.
+    First of base_name, base_name_o, base_name_o_o, ... not in `taken`.
+    Falls back to a timestamp if someone really spammed "_o".
     """
     new_name = base_name
-    # Safety limit to prevent infinite loops (though unlikely)
-    for _ in range(10): 
-        doc_ref = db.collection("strategies").document(new_name)
-        if not doc_ref.get().exists:
+    for _ in range(MAX_NAME_SUFFIXES):
+        if new_name not in taken:
             return new_name
         new_name += "_o"
-    
-    # Fallback with timestamp if someone really spammed "_o"
     return f"{base_name}_{int(datetime.now().timestamp())}"
 
+def _prefix_query(db, base_name: str):
+    """Every 'strategies' document whose id starts with base_name (ids only)."""
+    from google.cloud.firestore_v1.field_path import FieldPath
+
+    strategies = db.collection("strategies")
+    return (
+        strategies
+        .where(filter=FieldFilter(FieldPath.document_id(), ">=", strategies.document(base_name)))
+        .where(filter=FieldFilter(FieldPath.document_id(), "<", strategies.document(base_name + "\uf8ff")))
+        .select(["name"])
+    )
+
+def claim_strategy_name(db, base_name: str, strategy_data: dict, team_ref, team_update: dict) -> str:
+    """
+    Picks a unique name for base_name (appending '_o' while taken, from one
+    range query over the ids sharing the prefix) and writes the strategy and
+    the team's finalized fields in one transaction. The prefix read is part
+    of the transaction and the strategy is created (never overwritten), so
+    concurrent lock-ins of the same name cannot both claim it.
+    """
+    @firestore.transactional
+    def claim(transaction):
+        taken = {snap.id for snap in transaction.get(_prefix_query(db, base_name))}
+        final_name = pick_unique_name(base_name, taken)
+        transaction.create(db.collection("strategies").document(final_name), {**strategy_data, "name": final_name})
+        transaction.update(team_ref, {**team_update, "finalized_strategy": final_name})
+        return final_name
+
+    return claim(db.transaction())
+
 def lock_selection(req: https_fn.Request) -> https_fn.Response:
     """
     Payload:
@@ -79,43 +112,63 @@ def lock_selection(req: https_fn.Request) -> https_fn.Response:
             return https_fn.Response(json.dumps({"error": "Selected draft has no code."}), status=400)
 
         # 3. Generate Signature
-        # We need to load the function to hash its logic
-        func_obj = load_strategy_from_code(code, original_name)
-        if not func_obj:
-            return https_fn.Response(json.dumps({"error": "Code in draft is invalid/unparseable."}), status=400)
-        
-        signature = generate_strategy_signature(func_obj)
+        # submit_draft already validated and signed this code; reuse that
+        # unless the code, the ruleset or the signature format changed since
+        # (or the draft predates it)
+        signature = selected_draft.get("signature")
+        minhash = selected_draft.get("minhash")
+        reusable = (
+            selected_draft.get("is_valid")
+            and signature
+            and minhash
+            and selected_draft.get("minhash_version") == FINGERPRINT_VERSION
+            and signature_version(signature) == SIGNATURE_VERSION
+            and selected_draft.get("code_hash") == code_hash(code)
+            and selected_draft.get("rules") == compile_rules().digest
+        )
 
-        # 4. Check Signature against Global Pool (Plagiarism Check)
-        # We allow the lock-in but flag it if logic is identical to an EXISTING strategy
-        is_logic_unique = True
-        sig_docs = db.collection("strategies").where(filter=FieldFilter("signature", "==", signature)).limit(1).stream()
-        for _ in sig_docs:
-            is_logic_unique = False
-            # We don't break here, just one match is enough to flag
-
-        # 5. Determine Unique Strategy Name
-        final_strategy_name = get_unique_strategy_name(db, original_name)
-        name_changed = (final_strategy_name != original_name)
+        signature_index = get_signature_index()
+        # Strategies not re-signed yet only carry v1 signatures; compare against those too
+        legacy = signature_index.needs_legacy()
+        func_obj = None
+        if not reusable or legacy:
+            # We need to load the function to hash its logic
+            func_obj = load_strategy_from_code(code, original_name)
+            if not func_obj:
+                return https_fn.Response(json.dumps({"error": "Code in draft is invalid/unparseable."}), status=400)
+
+        if not reusable:
+            signature = generate_strategy_signature(func_obj)
+            minhash = fingerprint(func_obj)
+        signature_v1 = generate_strategy_signature(func_obj, version=1) if legacy else None
 
-        # 6. Save to 'strategies' Collection
+        # 4. Check Signature against Global Pool (Plagiarism Check)
+        # We allow the lock-in but flag it if logic is identical to an EXISTING strategy,
+        # and report how close the nearest other team's strategy plays (0.0 - 1.0)
+        is_logic_unique = not signature_index.contains(signature, signature_v1)
+        matches = signature_index.similar(minhash, exclude_team=team_name)
+        similar_to, similarity_score = matches[0] if matches else (None, 0.0)
+
+        # 5. Save to 'strategies' Collection under a unique name and
+        # 6. Update Team Document (Finalize), atomically
         strategy_data = {
-            "name": final_strategy_name,
             "code": code,
             "signature": signature,
             "team_name": team_name,
             "original_draft_id": draft_id,
             "is_logic_unique": is_logic_unique,
+            "minhash": minhash,
+            "minhash_version": FINGERPRINT_VERSION,
+            "similarity_score": similarity_score,
+            "similar_to": similar_to,
             "updatedAt": datetime.now(timezone.utc)
         }
 
-        db.collection("strategies").document(final_strategy_name).set(strategy_data)
-
-        # 7. Update Team Document (Finalize)
-        team_ref.update({
-            "finalized_strategy": final_strategy_name,
+        final_strategy_name = claim_strategy_name(db, original_name, strategy_data, team_ref, {
             "finalized_at": datetime.now(timezone.utc)
         })
+        name_changed = (final_strategy_name != original_name)
+        signature_index.add(signature, final_strategy_name, minhash, team_name)
 
         return https_fn.Response(
             json.dumps({
@@ -123,7 +176,9 @@ def lock_selection(req: https_fn.Request) -> https_fn.Response:
                 "message": f"Strategy locked in as '{final_strategy_name}'.",
                 "final_name": final_strategy_name,
                 "name_changed": name_changed,
-                "is_logic_unique": is_logic_unique
+                "is_logic_unique": is_logic_unique,
+                "similarity_score": similarity_score,
+                "similar_to": similar_to
             }),
             status=200,
             headers={"Content-Type": "application/json"}
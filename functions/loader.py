@@ -1,6 +1,13 @@
 import os
+import sys
 import ast
 import types
+import marshal
+import hashlib
+import threading
+from collections import OrderedDict
+from screening import Screening, SCREEN_VERSION, screen_tree
+from match_rng import strategy_builtins
 
 def validate_signature(func):
     """Checks if the function accepts the 4 required arguments."""
@@ -12,37 +19,175 @@ def validate_signature(func):
     except AttributeError:
         return False
 
+# --- COMPILED STRATEGY CACHE ---
+# Compiled code objects keyed by SHA-256 of the source, shared by every
+# loader here (and tournament.fetch_strategies_from_firestore). Each load
+# still executes the code in a fresh module, so strategies never share
+# module state; only parsing/compiling, screening (see screening.py) and
+# entry-point lookup are reused.
+STRATEGY_CACHE_SIZE = int(os.environ.get("STRATEGY_CACHE_SIZE", "256"))
+# Optional on-disk marshal cache; files are tagged with the interpreter's
+# cache_tag since marshal output is only valid for the same Python version.
+STRATEGY_CACHE_DIR = os.environ.get("STRATEGY_CACHE_DIR")
+
+class StrategyRejected(Exception):
+    """Strategy source failed static screening and was never executed."""
+
+class CompiledStrategy:
+    __slots__ = ("code", "error", "screening", "entries")
+
+    def __init__(self, code=None, error=None, screening=None):
+        self.code = code            # Compiled module code, None if it does not compile
+        self.error = error          # The SyntaxError (or similar) compile raised
+        self.screening = screening  # Static checks of the source
+        self.entries = {}           # strict -> (entry function name, error message)
+        if screening is not None and screening.resolved:
+            self.entries[False] = (screening.entry, None)
+            self.entries[True] = (screening.strict_entry, screening.strict_error)
+
+class StrategyCache:
+    """LRU of CompiledStrategy by source hash, backed by an optional marshal directory."""
+
+    def __init__(self, max_entries=STRATEGY_CACHE_SIZE, cache_dir=STRATEGY_CACHE_DIR):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.{sys.implementation.cache_tag}.s{SCREEN_VERSION}.marshal")
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                return marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+    def _write_disk(self, key, data):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                marshal.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[WARN] Could not write strategy cache: {e}")
+
+    def get(self, source_code) -> CompiledStrategy:
+        key = hashlib.sha256(source_code.encode()).hexdigest()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        cached = self._read_disk(key)
+        if cached is not None:
+            code, screening = cached
+            entry = CompiledStrategy(code, screening=Screening.from_tuple(screening))
+        else:
+            try:
+                # Parse once: the same tree is screened and compiled
+                tree = ast.parse(source_code, "<string>")
+                screening = screen_tree(tree)
+                for warning in screening.warnings:
+                    print(f"[WARN] Strategy screening: {warning}")
+                entry = CompiledStrategy(compile(tree, "<string>", "exec"), screening=screening)
+                self._write_disk(key, (entry.code, screening.to_tuple()))
+            except Exception as e:
+                entry = CompiledStrategy(error=e)
+
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+
+_cache = StrategyCache()
+
+def precompile(source_code) -> CompiledStrategy:
+    """Compiles and screens source into the shared cache without executing it."""
+    return _cache.get(source_code)
+
+def _find_lenient(mod):
+    """Entry point as load_strategy_from_code picks it: 'strategy', else the first 4-arg function."""
+    if "strategy" in mod.__dict__ and callable(mod.strategy):
+        if validate_signature(mod.strategy):
+            return "strategy", None
+
+    for n, obj in mod.__dict__.items():
+        if isinstance(obj, types.FunctionType):
+            if validate_signature(obj) and n != "strategy":
+                return n, None
+    return None, None
+
+def _find_strict(mod):
+    """Entry point as load_strategy_with_error picks it, with the reason when there is none."""
+    if "strategy" in mod.__dict__ and callable(mod.strategy):
+        if not validate_signature(mod.strategy):
+            return None, "Function 'strategy' found, but it does not accept exactly 4 arguments: (free, opp, mine, energy)."
+        return "strategy", None
+
+    for n, obj in mod.__dict__.items():
+        if isinstance(obj, types.FunctionType) and n != "strategy":
+            # Check signature
+            if validate_signature(obj):
+                return n, None
+            return None, f"Function '{n}' does not accept exactly 4 arguments: (free, opp, mine, energy)."
+
+    return None, "No valid Python function found in the generated code."
+
+def load_strategy(source_code, name="uploaded_strategy", strict=False):
+    """
+    Executes (cached) compiled source in a fresh module and returns
+    (function, error message). Compile and execution errors are raised,
+    as is StrategyRejected when screening fails (the code is not executed).
+    strict=True applies load_strategy_with_error's arity rules.
+    """
+    compiled = _cache.get(source_code)
+    if compiled.error is not None:
+        raise compiled.error.with_traceback(None)
+    if compiled.screening.errors:
+        raise StrategyRejected(" ".join(compiled.screening.errors))
+
+    # Sources known (statically or from an earlier load) to have no usable entry are not executed
+    resolved = compiled.entries.get(strict)
+    if resolved is not None and resolved[0] is None:
+        return None, resolved[1]
+
+    # 1. Create a dynamic module ('import random' binds the per-match RNG proxy, see match_rng)
+    mod = types.ModuleType(f"dynamic_strat_{name}")
+    mod.__dict__["__builtins__"] = strategy_builtins()
+
+    # 2. Execute code
+    exec(compiled.code, mod.__dict__)
+
+    # 3. Find function (resolved once per source and mode)
+    if resolved is None:
+        resolved = compiled.entries[strict] = (_find_strict if strict else _find_lenient)(mod)
+    entry_name, error = resolved
+
+    found_func = mod.__dict__.get(entry_name) if entry_name else None
+    return found_func, error
+
 def load_strategy_from_code(source_code, name="uploaded_strategy"):
     """
     Parses a string of Python code and returns the strategy function.
     Returns None if no valid strategy function is found.
     """
     try:
-        # 1. Create a dynamic module
-        module_name = f"dynamic_strat_{name}"
-        mod = types.ModuleType(module_name)
-        
-        # 2. Execute code
-        exec(source_code, mod.__dict__)
-        
-        # 3. Find function
-        found_func = None
-        
-        # Priority: 'strategy' function
-        if "strategy" in mod.__dict__ and callable(mod.strategy):
-            if validate_signature(mod.strategy):
-                found_func = mod.strategy
-        
-        # Fallback: First valid function
-        if not found_func:
-            for n, obj in mod.__dict__.items():
-                if isinstance(obj, types.FunctionType):
-                    if validate_signature(obj) and n != "strategy":
-                        found_func = obj
-                        break
-        
-        return found_func
-        
+        return load_strategy(source_code, name)[0]
     except Exception as e:
         print(f"Error parsing strategy code: {e}")
         return None
@@ -52,30 +197,9 @@ def load_strategy_with_error(source_code, name="uploaded_strategy"):
     Like load_strategy_from_code, but returns (function, error_message).
     """
     try:
-        module_name = f"dynamic_strat_{name}"
-        mod = types.ModuleType(module_name)
-        exec(source_code, mod.__dict__)
-        
-        found_func = None
-        if "strategy" in mod.__dict__ and callable(mod.strategy):
-            found_func = mod.strategy
-            if not validate_signature(found_func):
-                return None, "Function 'strategy' found, but it does not accept exactly 4 arguments: (free, opp, mine, energy)."
-        
-        if not found_func:
-            for n, obj in mod.__dict__.items():
-                if isinstance(obj, types.FunctionType) and n != "strategy":
-                    # Check signature
-                    if validate_signature(obj):
-                        found_func = obj
-                        break
-                    else:
-                        return None, f"Function '{n}' does not accept exactly 4 arguments: (free, opp, mine, energy)."
-                        
-        if found_func:
-            return found_func, None
-            
-        return None, "No valid Python function found in the generated code."
+        return load_strategy(source_code, name, strict=True)
+    except StrategyRejected as e:
+        return None, f"Rejected before execution: {str(e)}"
     except Exception as e:
         return None, f"Execution/Syntax Error: {str(e)}"
 
@@ -7,7 +7,8 @@ from firebase_functions.options import set_global_options, MemoryOption
 initialize_app()
 set_global_options(max_instances=10, timeout_sec=540)
 
-@firestore_fn.on_document_written(document="strategies/{strat_id}", memory=1024)
+# The league runs one worker process per vCPU (tournament_runner.LEAGUE_WORKERS)
+@firestore_fn.on_document_written(document="strategies/{strat_id}", memory=1024, cpu=2)
 def run_tournament(event: firestore_fn.Event[firestore_fn.Change[firestore_fn.DocumentSnapshot]]) -> None:
     from tournament_runner import run_tournament as _run_tournament
     return _run_tournament(event)
@@ -20,6 +21,19 @@ def submit_draft(req: https_fn.Request) -> https_fn.Response:
     from draft_pipeline import submit_draft as _submit_draft
     return _submit_draft(req)
 
+@firestore_fn.on_document_created(document="draft_jobs/{job_id}", memory=MemoryOption.MB_512)
+def process_draft_job(event: firestore_fn.Event[firestore_fn.DocumentSnapshot]) -> None:
+    from draft_pipeline import process_draft_job as _process_draft_job
+    return _process_draft_job(event)
+
+@https_fn.on_request(
+    memory=MemoryOption.MB_256,
+    cors=options.CorsOptions(cors_origins="*", cors_methods=["get", "options"])
+)
+def draft_status(req: https_fn.Request) -> https_fn.Response:
+    from draft_pipeline import draft_status as _draft_status
+    return _draft_status(req)
+
 @https_fn.on_request(
     memory=MemoryOption.MB_512,
     cors=options.CorsOptions(cors_origins="*", cors_methods=["get", "post", "options"])
@@ -0,0 +1,99 @@
+import types
+import random as _random
+import hashlib
+import builtins
+import threading
+from screening import ALLOWED_IMPORTS, BLOCKED_ATTRIBUTES
+
+# Bumped whenever the per-match RNG derivation changes (stored match results depend on it)
+MATCH_RNG_VERSION = 1
+
+# --- PER-SEAT RNG ---
+def seat_rng(match_seed: int, seat: str, strategy_key: str) -> _random.Random:
+    """
+    Isolated RNG of one seat ('A'/'B') in one match, derived from the match
+    seed (itself derived from both strategies, see tournament.match_seed),
+    the seat and the seated strategy's own key.
+    """
+    digest = hashlib.sha256(f"rng{MATCH_RNG_VERSION}:{match_seed}:{seat}:{strategy_key}".encode()).digest()
+    return _random.Random(int.from_bytes(digest[:8], "big"))
+
+class _Current(threading.local):
+    rng = None
+
+_current = _Current()
+
+def call_with_rng(rng, func, *args):
+    """Calls func with `rng` behind the `random` proxy (restored afterwards)."""
+    previous = _current.rng
+    _current.rng = rng
+    try:
+        return func(*args)
+    finally:
+        _current.rng = previous
+
+def with_rng(func, rng):
+    """Strategy callable that plays func with its own RNG (None keeps the global one)."""
+    if rng is None:
+        return func
+
+    def seeded(free, opp, mine, energy):
+        previous = _current.rng
+        _current.rng = rng
+        try:
+            return func(free, opp, mine, energy)
+        finally:
+            _current.rng = previous
+
+    seeded.__wrapped__ = func
+    return seeded
+
+# --- `random` PROXY ---
+# Stands in for the `random` module inside strategies: every function
+# (random.choice, from random import randint, ...) draws from the RNG of
+# the seat currently being called, and from the global module outside a
+# match (so signature checks that seed the global module are unchanged).
+def _dispatch(name):
+    fallback = getattr(_random, name)
+
+    def call(*args, **kwargs):
+        rng = _current.rng
+        if rng is None:
+            return fallback(*args, **kwargs)
+        return getattr(rng, name)(*args, **kwargs)
+
+    call.__name__ = call.__qualname__ = name
+    call.__doc__ = fallback.__doc__
+    return call
+
+random = types.ModuleType("random", "Per-match RNG proxy of the random module (see match_rng).")
+for _name in dir(_random):
+    if _name.startswith("_"):
+        continue
+    _value = getattr(_random, _name)
+    if callable(_value) and not isinstance(_value, type) and hasattr(_random.Random, _name):
+        setattr(random, _name, _dispatch(_name))
+    else:
+        setattr(random, _name, _value)
+
+def _import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Enforces screening's allowlist at runtime too (static checks can be dodged)
+    if level != 0 or name.split(".")[0] not in ALLOWED_IMPORTS:
+        raise ImportError(f"Import of '{name}' is not allowed.")
+    for attr in fromlist or ():
+        if attr in BLOCKED_ATTRIBUTES:
+            raise ImportError(f"Import of '{attr}' from '{name}' is not allowed.")
+    if name == "random":
+        return random
+    return builtins.__import__(name, globals, locals, fromlist, level)
+
+def strategy_builtins() -> dict:
+    """
+    Builtins for an exec'd strategy module: `import random` (at module level
+    or inside a function) yields the proxy, and modules outside
+    screening.ALLOWED_IMPORTS cannot be imported. A fresh dict per module, so one
+    strategy cannot change another's builtins.
+    """
+    namespace = dict(builtins.__dict__)
+    namespace["__import__"] = _import
+    return namespace
@@ -0,0 +1,114 @@
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable
+
+from match_rng import MATCH_RNG_VERSION
+
+COLLECTION_MATCH_RESULTS = "match_results"
+
+# --- KEYS ---
+def code_hash(source_code: str) -> str:
+    """SHA-256 of a strategy's source code."""
+    return hashlib.sha256(source_code.encode()).hexdigest()
+
+def match_key(home_hash: str, away_hash: str, rules_digest: str, seed: int) -> str:
+    """Store key of one match: (code hash of A, code hash of B, ruleset hash, seed, RNG scheme)."""
+    return hashlib.sha256(f"{home_hash}:{away_hash}:{rules_digest}:{seed}:rng{MATCH_RNG_VERSION}".encode()).hexdigest()
+
+def match_record(home_hash, away_hash, rules_digest, seed, score_a, score_b) -> Dict:
+    return {
+        "home_hash": home_hash,
+        "away_hash": away_hash,
+        "rules": rules_digest,
+        "seed": seed,
+        "score_a": int(score_a),
+        "score_b": int(score_b),
+    }
+
+# --- LOCAL BACKEND ---
+class LocalMatchStore:
+    """Match results kept in a single JSON file on disk (in memory only when path is None)."""
+
+    def __init__(self, path="match_results.json"):
+        self.path = path
+        self.records = {}
+        if path is not None and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.records = json.load(f)
+
+    def _save(self):
+        if self.path is None:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.records, f)
+        os.replace(tmp_path, self.path)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        return {k: self.records[k] for k in keys if k in self.records}
+
+    def put_many(self, records: Dict[str, Dict]) -> None:
+        if records:
+            self.records.update(records)
+            self._save()
+
+    def evict(self, code_hashes: Iterable[str]) -> int:
+        """Drops every match involving one of the given code hashes."""
+        stale = set(code_hashes)
+        keys = [k for k, r in self.records.items() if r["home_hash"] in stale or r["away_hash"] in stale]
+        for k in keys:
+            del self.records[k]
+        if keys:
+            self._save()
+        return len(keys)
+
+# --- FIRESTORE BACKEND ---
+class FirestoreMatchStore:
+    """Match results kept as one document per match in 'match_results'."""
+
+    # Firestore caps a batch at 500 writes
+    BATCH_LIMIT = 500
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.collection(COLLECTION_MATCH_RESULTS)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        refs = [self.collection.document(k) for k in keys]
+        if not refs:
+            return {}
+        return {snap.id: snap.to_dict() for snap in self.db.get_all(refs) if snap.exists}
+
+    def _commit_in_batches(self, operations):
+        batch = self.db.batch()
+        pending = 0
+        for apply in operations:
+            apply(batch)
+            pending += 1
+            if pending == self.BATCH_LIMIT:
+                batch.commit()
+                batch = self.db.batch()
+                pending = 0
+        if pending:
+            batch.commit()
+
+    def put_many(self, records: Dict[str, Dict]) -> None:
+        now = datetime.now(timezone.utc)
+        self._commit_in_batches(
+            (lambda b, k=k, r=r: b.set(self.collection.document(k), {**r, "updatedAt": now}))
+            for k, r in records.items()
+        )
+
+    def evict(self, code_hashes: Iterable[str]) -> int:
+        """Deletes every match involving one of the given code hashes."""
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        refs = {}
+        for h in set(code_hashes):
+            for field in ("home_hash", "away_hash"):
+                for snap in self.collection.where(filter=FieldFilter(field, "==", h)).stream():
+                    refs[snap.id] = snap.reference
+        self._commit_in_batches((lambda b, ref=ref: b.delete(ref)) for ref in refs.values())
+        return len(refs)
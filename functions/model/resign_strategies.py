@@ -0,0 +1,62 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+import firebase_admin
+from firebase_admin import firestore
+
+# Run from functions/model; the game modules live one level up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from loader import load_strategy_from_code
+from signature_check import generate_strategy_signature, signature_version, SIGNATURE_VERSION
+from similarity import fingerprint, FINGERPRINT_VERSION
+
+
+def get_firestore_client():
+    try:
+        app = firebase_admin.get_app()
+    except ValueError:
+        app = firebase_admin.initialize_app()
+    return firestore.client(app)
+
+
+def resign():
+    """
+    Re-signs every strategy whose signature predates SIGNATURE_VERSION and
+    re-fingerprints every one whose MinHash predates FINGERPRINT_VERSION.
+    """
+    db = get_firestore_client()
+    resigned = 0
+    fingerprinted = 0
+
+    for snap in db.collection("strategies").stream():
+        data = snap.to_dict()
+        signature = data.get("signature") or ""
+        stale_signature = not signature or signature_version(signature) != SIGNATURE_VERSION
+        stale_minhash = not data.get("minhash") or data.get("minhash_version", 1) != FINGERPRINT_VERSION
+        if not stale_signature and not stale_minhash:
+            continue
+
+        func = load_strategy_from_code(data.get("code", ""), snap.id)
+        if not func:
+            print(f"Skipping {snap.id}: code does not load.")
+            continue
+
+        update = {"updatedAt": datetime.now(timezone.utc)}
+        if stale_signature:
+            update["signature"] = generate_strategy_signature(func)
+            update["signature_v1"] = signature
+            resigned += 1
+        if stale_minhash:
+            update["minhash"] = fingerprint(func)
+            update["minhash_version"] = FINGERPRINT_VERSION
+            fingerprinted += 1
+        snap.reference.update(update)
+
+    print(f"Re-signed {resigned} strategies to v{SIGNATURE_VERSION}, "
+          f"re-fingerprinted {fingerprinted} to v{FINGERPRINT_VERSION}.")
+
+
+if __name__ == "__main__":
+    resign()
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import firebase_admin
+from firebase_admin import firestore
+
+# Run from functions/model; the game modules live one level up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from screening import screen_strategy, SCREEN_VERSION
+
+
+def get_firestore_client():
+    try:
+        app = firebase_admin.get_app()
+    except ValueError:
+        app = firebase_admin.initialize_app()
+    return firestore.client(app)
+
+
+def rescreen():
+    """
+    Lists locked strategies the current screening rules would reject. Run it
+    before deploying a SCREEN_VERSION bump: the league leaves them out.
+    Exits non-zero if any are found.
+    """
+    db = get_firestore_client()
+    rejected = 0
+
+    for snap in db.collection("strategies").stream():
+        data = snap.to_dict()
+        screening = screen_strategy(data.get("code", ""))
+        if screening.errors:
+            rejected += 1
+            print(f"{snap.id} ({data.get('team_name', 'Unknown Team')}): {' '.join(screening.errors)}")
+
+    print(f"{rejected} strategies fail screening v{SCREEN_VERSION}.")
+    return rejected
+
+
+if __name__ == "__main__":
+    sys.exit(1 if rescreen() else 0)
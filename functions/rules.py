@@ -0,0 +1,103 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Dict, Tuple
+from config import GAME_CONFIG
+
+# --- COMPILED RULESET ---
+# Flat lookup tables derived once from a GAME_CONFIG-style dict.
+# Per-node tuples are indexed by node id (index 0 is unused padding).
+@dataclass(frozen=True, slots=True)
+class CompiledRules:
+    num_nodes: int
+    max_rounds: int
+    home: Dict[str, int]
+    node_ids: Dict[int, int]            # Normalises equal-valued targets (3.0, numpy ints) to node ids
+    bits: Tuple[int, ...]
+    full_mask: int
+    power_mask: int
+    protected_mask: int                 # Home bases can never be conquered
+    neighbors: Tuple[Tuple[int, ...], ...]
+    neighbor_masks: Tuple[int, ...]
+    expand_cost: Tuple[int, ...]
+    conquer_cost: Tuple[int, ...]
+    harvest_yield: Dict[str, Tuple[int, ...]]
+    harvest_classes: Dict[str, Tuple[Tuple[int, int], ...]]  # (mask, yield) pairs per player
+    collision_penalty: int
+    defense_bonus: int
+    digest: str                         # Stable hash of the source config
+
+def config_digest(config) -> str:
+    """SHA-256 of the canonical JSON form of a game config."""
+    canonical = json.dumps(config, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def _build_rules(config, digest) -> CompiledRules:
+    n = config["num_nodes"]
+    nodes = range(1, n + 1)
+    power = set(config["power_nodes"])
+    home = {'A': config["home_a"], 'B': config["home_b"]}
+
+    bits = (0,) + tuple(1 << (i - 1) for i in nodes)
+    neighbors = ((),) + tuple(
+        (i - 1 if i > 1 else n, i + 1 if i < n else 1) for i in nodes
+    )
+    neighbor_masks = (0,) + tuple(
+        sum(bits[nb] for nb in set(neighbors[i])) for i in nodes
+    )
+    full_mask = (1 << n) - 1
+    power_mask = sum(bits[p] for p in power if 1 <= p <= n)
+
+    harvest_yield = {}
+    harvest_classes = {}
+    for p, home_node in home.items():
+        yields = [0]
+        for i in nodes:
+            if i == home_node:
+                yields.append(config["harvest_home"])
+            elif i in power:
+                yields.append(config["harvest_power"])
+            else:
+                yields.append(config["harvest_normal"])
+        harvest_yield[p] = tuple(yields)
+
+        home_mask = bits[home_node]
+        harvest_classes[p] = (
+            (home_mask, config["harvest_home"]),
+            (power_mask & ~home_mask, config["harvest_power"]),
+            (full_mask & ~power_mask & ~home_mask, config["harvest_normal"]),
+        )
+
+    return CompiledRules(
+        num_nodes=n,
+        max_rounds=config["max_rounds"],
+        home=home,
+        node_ids={i: i for i in nodes},
+        bits=bits,
+        full_mask=full_mask,
+        power_mask=power_mask,
+        protected_mask=bits[home['A']] | bits[home['B']],
+        neighbors=neighbors,
+        neighbor_masks=neighbor_masks,
+        expand_cost=(0,) + tuple(
+            config["cost_expand_power"] if i in power else config["cost_expand_normal"] for i in nodes
+        ),
+        conquer_cost=(0,) + tuple(
+            config["cost_conquer_power_base"] if i in power else config["cost_conquer_normal_base"] for i in nodes
+        ),
+        harvest_yield=harvest_yield,
+        harvest_classes=harvest_classes,
+        collision_penalty=config["collision_penalty"],
+        defense_bonus=config["defense_bonus_per_neighbor"],
+        digest=digest,
+    )
+
+_compiled_cache: Dict[str, CompiledRules] = {}
+
+def compile_rules(config=GAME_CONFIG) -> CompiledRules:
+    """Returns the shared CompiledRules for a config, building it on first use."""
+    digest = config_digest(config)
+    rules = _compiled_cache.get(digest)
+    if rules is None:
+        rules = _compiled_cache[digest] = _build_rules(config, digest)
+    return rules
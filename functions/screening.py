@@ -0,0 +1,246 @@
+import ast
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# Bumped whenever the rules below change (cached screenings are keyed on it)
+SCREEN_VERSION = 3
+
+# Modules a strategy may import; anything else is rejected before exec (and
+# refused at runtime by match_rng's import hook)
+ALLOWED_IMPORTS = {
+    "random", "math", "itertools", "functools", "collections", "heapq",
+    "bisect", "statistics", "operator", "copy", "typing", "dataclasses", "enum"
+}
+
+# Builtins (and the builtins namespace) that would sidestep the import check
+# or reach outside the game; they may not be referenced at all
+BLOCKED_NAMES = {
+    "__import__", "eval", "exec", "compile", "open", "input", "breakpoint",
+    "globals", "locals", "vars", "__builtins__"
+}
+
+# Attributes that lead from allowed modules or plain objects to sys, os,
+# builtins or arbitrary classes (typing.sys, random._os, f.__globals__, ...)
+BLOCKED_ATTRIBUTES = {
+    "sys", "_sys", "os", "_os", "builtins", "bltns", "inspect", "types", "_thread", "modules",
+    "__builtins__", "__globals__", "__subclasses__", "__bases__", "__base__", "__mro__",
+    "__code__", "__closure__", "__dict__", "__getattribute__", "__import__", "__loader__",
+    "__spec__", "__self__", "__func__", "__reduce__", "__reduce_ex__", "f_globals", "f_back",
+    "gi_frame", "cr_frame", "tb_frame"
+}
+
+# May only be called directly, with a constant attribute name that is not blocked
+REFLECTION_CALLS = {"getattr", "setattr", "delattr", "hasattr"}
+
+# Constant sizes (range bounds, sequence repetition) above which a call is flagged / rejected
+WARN_SIZE = 10 ** 5
+MAX_SIZE = 10 ** 7
+
+REQUIRED_ARGS = "(free, opp, mine, energy)"
+
+@dataclass
+class Screening:
+    """
+    Result of screening strategy source without executing it.
+    `errors` reject the code outright. The entry fields are only set when
+    the module is simple enough (just defs, plain imports and a docstring)
+    to resolve its entry function statically, mirroring loader.load_strategy.
+    Decorated functions are left to runtime: a decorator can replace the
+    function or change its arity.
+    """
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    entry: Optional[str] = None                 # Function the lenient loader would pick
+    strict_entry: Optional[str] = None          # Function load_strategy_with_error would pick
+    strict_error: Optional[str] = None          # Its reason when it would pick none
+    resolved: bool = False                      # True when the entry fields are meaningful
+
+    def to_tuple(self):
+        """Plain tuple of the fields, marshal-friendly for the on-disk loader cache."""
+        return (tuple(self.errors), tuple(self.warnings), self.entry, self.strict_entry, self.strict_error, self.resolved)
+
+    @classmethod
+    def from_tuple(cls, data):
+        errors, warnings, entry, strict_entry, strict_error, resolved = data
+        return cls(list(errors), list(warnings), entry, strict_entry, strict_error, resolved)
+
+def _const_int(node) -> Optional[int]:
+    """Value of a constant integer expression (literals, + - * ** <<), None if not constant."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, int) and not isinstance(node.value, bool):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _const_int(node.operand)
+        return None if value is None else -value
+    if isinstance(node, ast.BinOp):
+        left, right = _const_int(node.left), _const_int(node.right)
+        if left is None or right is None:
+            return None
+        if isinstance(node.op, ast.Add):
+            return left + right
+        if isinstance(node.op, ast.Sub):
+            return left - right
+        if isinstance(node.op, ast.Mult):
+            return left * right
+        # Exponent/shift results are capped so screening itself stays cheap
+        if isinstance(node.op, ast.Pow) and 0 <= right <= 64:
+            return left ** right if abs(left) < 2 ** 16 else MAX_SIZE * 10
+        if isinstance(node.op, ast.LShift) and 0 <= right <= 64:
+            return left << right
+        if isinstance(node.op, (ast.Pow, ast.LShift)):
+            return MAX_SIZE * 10
+    return None
+
+def _walk_scope(nodes):
+    """Walks statements without descending into nested functions, lambdas or classes."""
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        yield node
+        for child in ast.iter_child_nodes(node):
+            if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)):
+                stack.append(child)
+
+_EXITS = (ast.Return, ast.Raise, ast.Yield, ast.YieldFrom)
+
+def _loop_exits(loop) -> bool:
+    """
+    True if a while loop's body can leave it: a break of this loop, any
+    return/raise, or a yield (a generator's consumer decides when it stops).
+    """
+    stack = list(loop.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, _EXITS + (ast.Break,)):
+            return True
+        if isinstance(node, (ast.For, ast.AsyncFor, ast.While)):
+            # A break inside a nested loop only leaves that loop (its else clause belongs to ours)
+            if any(isinstance(n, _EXITS) for n in _walk_scope(node.body)):
+                return True
+            stack.extend(node.orelse)
+            continue
+        for child in ast.iter_child_nodes(node):
+            if not isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)):
+                stack.append(child)
+    return False
+
+def _is_truthy_constant(node) -> bool:
+    return isinstance(node, ast.Constant) and bool(node.value)
+
+def _arity(func: ast.FunctionDef) -> int:
+    """Positional parameter count, the static counterpart of __code__.co_argcount."""
+    return len(func.args.posonlyargs) + len(func.args.args)
+
+def _guarded_loops(tree) -> set:
+    """ids of while loops inside a try body, which an exception (e.g. StopIteration) can end."""
+    tries = (ast.Try, ast.TryStar) if hasattr(ast, "TryStar") else (ast.Try,)
+    return {
+        id(loop)
+        for node in ast.walk(tree) if isinstance(node, tries)
+        for loop in _walk_scope(node.body) if isinstance(loop, ast.While)
+    }
+
+def _check_tree(tree, result: Screening) -> None:
+    called = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    guarded = _guarded_loops(tree)
+    for node in ast.walk(tree):
+        line = getattr(node, "lineno", "?")
+
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                root = alias.name.split(".")[0]
+                if root not in ALLOWED_IMPORTS:
+                    result.errors.append(f"Import of '{alias.name}' is not allowed (line {line}).")
+        elif isinstance(node, ast.ImportFrom):
+            root = (node.module or "").split(".")[0]
+            if node.level or root not in ALLOWED_IMPORTS:
+                result.errors.append(f"Import from '{node.module or '.'}' is not allowed (line {line}).")
+            for alias in node.names:
+                if alias.name in BLOCKED_ATTRIBUTES:
+                    result.errors.append(f"Import of '{alias.name}' is not allowed (line {line}).")
+
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+            if node.id in BLOCKED_NAMES:
+                result.errors.append(f"Use of '{node.id}' is not allowed (line {line}).")
+            elif node.id in REFLECTION_CALLS and id(node) not in called:
+                result.errors.append(f"'{node.id}' may only be called directly (line {line}).")
+
+        elif isinstance(node, ast.Attribute) and node.attr in BLOCKED_ATTRIBUTES:
+            result.errors.append(f"Access to attribute '{node.attr}' is not allowed (line {line}).")
+
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            if node.func.id in REFLECTION_CALLS:
+                attr = node.args[1] if len(node.args) > 1 else None
+                if not (isinstance(attr, ast.Constant) and isinstance(attr.value, str)) or attr.value in BLOCKED_ATTRIBUTES:
+                    result.errors.append(f"'{node.func.id}' needs a constant, allowed attribute name (line {line}).")
+            elif node.func.id == "range" and node.args:
+                bounds = [_const_int(arg) for arg in node.args[:2]]
+                size = max((abs(b) for b in bounds if b is not None), default=None)
+                if size is not None and size >= MAX_SIZE:
+                    result.errors.append(f"range() of {size} iterations per call is too expensive (line {line}).")
+                elif size is not None and size >= WARN_SIZE:
+                    result.warnings.append(f"range() of {size} iterations per call (line {line}).")
+
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mult):
+            # [0] * N, "x" * N
+            for seq, count in ((node.left, node.right), (node.right, node.left)):
+                if isinstance(seq, (ast.List, ast.Tuple, ast.Constant)) and not isinstance(getattr(seq, "value", None), (int, float)):
+                    size = _const_int(count)
+                    if size is not None and size >= MAX_SIZE:
+                        result.errors.append(f"Allocation of {size} elements per call is too expensive (line {line}).")
+                    elif size is not None and size >= WARN_SIZE:
+                        result.warnings.append(f"Allocation of {size} elements per call (line {line}).")
+
+        elif isinstance(node, ast.While) and _is_truthy_constant(node.test) and id(node) not in guarded and not _loop_exits(node):
+            # Flagged only: a call in the body may still end it by raising
+            result.warnings.append(f"Possibly unbounded loop: 'while' at line {line} never breaks or returns.")
+
+def _resolve_entry(tree, result: Screening) -> None:
+    """Static twin of loader._find_lenient/_find_strict for modules of plain defs and imports."""
+    body = tree.body
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant):
+        body = body[1:]
+    if not all(isinstance(stmt, (ast.FunctionDef, ast.Import)) for stmt in body):
+        return
+    if any(isinstance(stmt, ast.FunctionDef) and stmt.decorator_list for stmt in body):
+        return
+
+    # Module dict order: first binding position, last definition's value
+    functions = {}
+    for stmt in body:
+        if isinstance(stmt, ast.FunctionDef):
+            functions[stmt.name] = stmt
+    result.resolved = True
+
+    strategy = functions.get("strategy")
+    if strategy is not None and _arity(strategy) == 4:
+        result.entry = "strategy"
+    else:
+        result.entry = next((n for n, f in functions.items() if n != "strategy" and _arity(f) == 4), None)
+
+    if strategy is not None:
+        if _arity(strategy) != 4:
+            result.strict_error = f"Function 'strategy' found, but it does not accept exactly 4 arguments: {REQUIRED_ARGS}."
+        else:
+            result.strict_entry = "strategy"
+        return
+    for n, f in functions.items():
+        if _arity(f) == 4:
+            result.strict_entry = n
+        else:
+            result.strict_error = f"Function '{n}' does not accept exactly 4 arguments: {REQUIRED_ARGS}."
+        return
+    result.strict_error = "No valid Python function found in the generated code."
+
+def screen_tree(tree) -> Screening:
+    result = Screening()
+    _check_tree(tree, result)
+    _resolve_entry(tree, result)
+    return result
+
+def screen_strategy(source_code: str) -> Screening:
+    """Screens strategy source without executing it; syntax errors are reported as errors."""
+    try:
+        tree = ast.parse(source_code)
+    except SyntaxError as e:
+        return Screening(errors=[f"Syntax Error: {e}"])
+    return screen_tree(tree)
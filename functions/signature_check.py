@@ -1,7 +1,34 @@
 import hashlib
 import os
-import pandas as pd
+import random
+import numpy as np
 from sim import GameSimRecorded
+from match_rng import with_rng
+
+# --- VERSIONS ---
+# v1: MD5 of a DataFrame.to_string() rendering (bare hex digest)
+# v2: SHA-256 streamed over the little-endian per-round arrays ("v2:" + hex digest)
+# Signatures of different versions never compare equal, so both can be stored
+# side by side while strategies are re-signed (see model/resign_strategies.py).
+SIGNATURE_VERSION = 2
+V2_PREFIX = "v2:"
+
+# Canonical dtype of each hashed column in v2
+_V2_DTYPES = {
+    'round': '<i4', 'score_a': '<i4', 'score_b': '<i4',
+    'energy_a': '<i4', 'energy_b': '<i4', 'move_a': 'u1', 'move_b': 'u1'
+}
+
+def signature_version(signature: str) -> int:
+    return 2 if signature.startswith(V2_PREFIX) else 1
+
+def _hash_columns_v2(tag: bytes, record, columns) -> str:
+    """Streams the row count and each column's canonical bytes into one SHA-256."""
+    h = hashlib.sha256(tag)
+    h.update(len(record).to_bytes(4, "little"))
+    for column in columns:
+        h.update(np.ascontiguousarray(record[column], dtype=_V2_DTYPES[column]).tobytes())
+    return V2_PREFIX + h.hexdigest()
 
 # 1. Define two simple, deterministic tester strategies
 def tester_strat_a(free, opp, mine, energy):
@@ -16,61 +43,93 @@ def tester_strat_b(free, opp, mine, energy):
         return ["EXPAND", max(free)]
     return ["HARVEST"]
 
-def generate_logical_signature():
+def generate_logical_signature(version=SIGNATURE_VERSION):
     """Runs a controlled match and generates a hash of the play-by-play data."""
     sim = GameSimRecorded(tester_strat_a, tester_strat_b)
-    df = sim.play_game()
+    record = sim.play_recorded()
     
+    columns = ['round', 'score_a', 'score_b', 'energy_a', 'energy_b']
+    if version >= 2:
+        return _hash_columns_v2(b"tos-logic-v2", record, columns)
+
+    import pandas as pd
+
     # Create a string representation of the critical game results
     # We include round, scores, and energy to capture any logic shifts
-    signature_base = df[['round', 'score_a', 'score_b', 'energy_a', 'energy_b']].to_string()
+    signature_base = pd.DataFrame({c: record[c] for c in columns}).to_string()
     
     # Return an MD5 hash of this result string
     return hashlib.md5(signature_base.encode()).hexdigest()
 
-def generate_strategy_signature(strategy_func):
+def generate_strategy_signature(strategy_func, seed=42, version=SIGNATURE_VERSION):
+    """Behavioural signature of a strategy (see probe_strategy_signature)."""
+    return probe_strategy_signature(strategy_func, seed, version)[0]
+
+def probe_strategy_signature(strategy_func, seed=42, version=SIGNATURE_VERSION):
     """
-    Generates a behavioral signature for a given strategy function.
+    Generates a behavioral signature for a given strategy function and
+    returns (signature, crashed).
     It plays the strategy against a deterministic opponent (tester_strat_a)
     and hashes the resulting game log.
     
     IMPORTANT: We force a fixed random seed (42) to ensure that strategies
     using random logic (e.g. random.choice) produce a deterministic signature.
+    Loaded strategies draw from a Random(seed) of their own (the `random`
+    proxy, see match_rng), so concurrent signature games on other threads
+    cannot interleave with it; the global module is seeded too for plain
+    functions.
+    Replaying under another seed tells whether a strategy is nondeterministic.
+    `version` selects the hash format (see SIGNATURE_VERSION).
+    When the signature game crashes, the signature is a hash of the error
+    message only, which different strategies can share; `crashed` tells
+    callers not to treat it as a fingerprint of the behaviour.
     """
-    import random
-    import numpy as np
-    
     # Enforce Determinism
-    random.seed(42)
-    np.random.seed(42)
+    random.seed(seed)
+    np.random.seed(seed)
 
     if not strategy_func:
-        return ""
+        return "", False
         
     try:
         # Run simulation: Candidate (A) vs Tester (B)
         # We allow the candidate to go first (Player A)
-        sim = GameSimRecorded(strategy_func, tester_strat_a) 
-        df = sim.play_game()
+        sim = GameSimRecorded(with_rng(strategy_func, random.Random(seed)), tester_strat_a)
+        record = sim.play_recorded()
+
+        if version >= 2:
+            return _hash_columns_v2(b"tos-strategy-v2", record, ['round', 'score_a', 'energy_a', 'move_a']), False
+
+        import pandas as pd
         
         # We capture the candidate's moves ('move_a') and the resulting game state.
         # This creates a fingerprint of how the strategy plays.
         # We strip the index/headers to ensure clean string data.
-        signature_data = df[['round', 'score_a', 'energy_a', 'move_a']].to_string(index=False, header=False)
+        # Only these four columns are rendered; the node lists are never decoded.
+        signature_frame = pd.DataFrame({
+            'round': record['round'],
+            'score_a': record['score_a'],
+            'energy_a': record['energy_a'],
+            'move_a': record.move_names('a')
+        })
+        signature_data = signature_frame.to_string(index=False, header=False)
         
-        return hashlib.md5(signature_data.encode()).hexdigest()
+        return hashlib.md5(signature_data.encode()).hexdigest(), False
     except Exception as e:
         # If the strategy crashes, we return a hash of the error
         # This ensures broken strategies also have a (somewhat) unique signature
-        return hashlib.md5(f"CRASH-{str(e)}".encode()).hexdigest()
+        if version >= 2:
+            return V2_PREFIX + hashlib.sha256(f"CRASH-{str(e)}".encode()).hexdigest(), True
+        return hashlib.md5(f"CRASH-{str(e)}".encode()).hexdigest(), True
 
 def verify_logic():
     sig_file = "signature.txt"
-    current_sig = generate_logical_signature()
     
     if os.path.exists(sig_file):
         with open(sig_file, 'r') as f:
             saved_sig = f.read().strip()
+        # Compare in the format the saved signature was written in
+        current_sig = generate_logical_signature(signature_version(saved_sig))
         
         if current_sig == saved_sig:
             print("Logical Signature Match: Game rules are identical.")
@@ -80,6 +139,7 @@ def verify_logic():
             print("The game rules (costs, yields, or mechanics) have changed.")
             return False
     else:
+        current_sig = generate_logical_signature()
         with open(sig_file, 'w') as f:
             f.write(current_sig)
         print(f"New logical signature stored: {current_sig}")
@@ -0,0 +1,174 @@
+import os
+import time
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from similarity import LSHIndex, FINGERPRINT_VERSION
+from signature_check import signature_version
+
+COLLECTION_STRATEGIES = "strategies"
+
+class SignatureIndex(ABC):
+    """
+    Behavioural signatures and MinHash sketches (see similarity.py) of the
+    locked-in strategies, kept in memory by warm instances so uniqueness and
+    similarity checks need no query.
+
+    A lookup first refreshes the index if it is older than `max_staleness`
+    seconds: only strategies written since the newest updatedAt already seen,
+    less `overlap_sec`, are fetched. The overlap catches writes that commit
+    after a later-stamped one was read (updatedAt is the writer's clock,
+    taken before its transaction commits); refetched strategies are simply
+    re-inserted. Every `full_reload_sec` it is rebuilt from scratch so
+    deleted or re-signed strategies drop out. Backends only provide _fetch().
+
+    v1 signatures (see signature_check) are kept apart in `legacy`: while any
+    strategy has not been re-signed yet (model/resign_strategies.py), callers
+    also compare a v1 signature of the candidate (see needs_legacy()).
+    """
+
+    def __init__(self, max_staleness=30.0, full_reload_sec=600.0, overlap_sec=60.0, clock=time.monotonic):
+        self.max_staleness = max_staleness
+        self.full_reload_sec = full_reload_sec
+        self.overlap_sec = overlap_sec
+        self.clock = clock
+        self.signatures = set()
+        self.legacy = set()
+        self.unmigrated = set()
+        self.sketches = LSHIndex()
+        self.teams: Dict[str, Optional[str]] = {}
+        self.cursor = None
+        self.lock = threading.Lock()
+        self._last_refresh = None
+        self._last_full_reload = None
+
+    @abstractmethod
+    def _fetch(self, since: Optional[datetime]) -> Iterable[Tuple[str, Dict]]:
+        """(strategy id, fields) of every strategy updated at or after `since` (all when None)."""
+
+    def _insert(self, strategy_id, signature, minhash, team_name, signature_v1=None,
+                minhash_version=FINGERPRINT_VERSION) -> None:
+        if signature and signature_version(signature) == 1:
+            self.legacy.add(signature)
+            self.unmigrated.add(strategy_id)
+        elif signature:
+            self.signatures.add(signature)
+            self.unmigrated.discard(strategy_id)
+        if signature_v1:
+            self.legacy.add(signature_v1)
+        # Sketches of another FINGERPRINT_VERSION are skipped until re-fingerprinted
+        if strategy_id and minhash and minhash_version == FINGERPRINT_VERSION:
+            self.sketches.add(strategy_id, list(minhash))
+            self.teams[strategy_id] = team_name
+
+    def refresh(self, force=False) -> None:
+        with self.lock:
+            now = self.clock()
+            if not force and self._last_refresh is not None and now - self._last_refresh < self.max_staleness:
+                return
+            full = self._last_full_reload is None or now - self._last_full_reload >= self.full_reload_sec
+            if full:
+                self.signatures = set()
+                self.legacy = set()
+                self.unmigrated = set()
+                self.sketches = LSHIndex()
+                self.teams = {}
+                self.cursor = None
+
+            cursor = self.cursor
+            since = cursor - timedelta(seconds=self.overlap_sec) if cursor is not None else None
+            for strategy_id, data in self._fetch(since):
+                self._insert(strategy_id, data.get("signature"), data.get("minhash"), data.get("team_name"),
+                             data.get("signature_v1"), data.get("minhash_version", 1))
+                updated_at = data.get("updatedAt")
+                if updated_at is not None and (cursor is None or updated_at > cursor):
+                    cursor = updated_at
+
+            self.cursor = cursor
+            self._last_refresh = now
+            if full:
+                self._last_full_reload = now
+
+    def needs_legacy(self) -> bool:
+        """True while some strategy only has a v1 signature, so candidates need a v1 signature too."""
+        self.refresh()
+        return bool(self.unmigrated)
+
+    def contains(self, signature: str, signature_v1: Optional[str] = None) -> bool:
+        self.refresh()
+        return signature in self.signatures or (signature_v1 is not None and signature_v1 in self.legacy)
+
+    def similar(self, minhash: List[int], exclude_team: Optional[str] = None) -> List[Tuple[str, float]]:
+        """(strategy id, estimated similarity) of LSH candidates, most similar first, skipping one team's own strategies."""
+        self.refresh()
+        with self.lock:
+            exclude = [key for key, team in self.teams.items() if exclude_team is not None and team == exclude_team]
+            return self.sketches.query(minhash, exclude=exclude)
+
+    def add(self, signature: str, strategy_id: Optional[str] = None, minhash: Optional[List[int]] = None, team_name: Optional[str] = None) -> None:
+        """Makes a strategy this instance just wrote visible before the next refresh."""
+        with self.lock:
+            self._insert(strategy_id, signature, minhash, team_name)
+
+# --- FIRESTORE BACKEND ---
+class FirestoreSignatureIndex(SignatureIndex):
+    """Index over the 'strategies' collection, fetching only the fields it needs."""
+
+    def __init__(self, db, **kwargs):
+        super().__init__(**kwargs)
+        self.collection = db.collection(COLLECTION_STRATEGIES)
+
+    def _fetch(self, since):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        query = self.collection
+        if since is not None:
+            # >= so strategies sharing the cursor's timestamp are not missed
+            query = query.where(filter=FieldFilter("updatedAt", ">=", since))
+        for snap in query.select(["signature", "signature_v1", "minhash", "minhash_version", "team_name", "updatedAt"]).stream():
+            yield snap.id, snap.to_dict() or {}
+
+# --- LOCAL BACKEND ---
+class LocalSignatureIndex(SignatureIndex):
+    """Firestore-free stand-in for tests and benchmarks; strategies are added with publish()."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.records = []
+
+    def publish(self, signature: str, updated_at: Optional[datetime] = None, strategy_id: Optional[str] = None,
+                minhash: Optional[List[int]] = None, team_name: Optional[str] = None,
+                signature_v1: Optional[str] = None) -> None:
+        """Records a strategy write, as lock_selection (or the re-signing migration) would in 'strategies'."""
+        self.records.append((strategy_id or f"local_{len(self.records)}", {
+            "signature": signature,
+            "signature_v1": signature_v1,
+            "minhash": minhash,
+            "minhash_version": FINGERPRINT_VERSION,
+            "team_name": team_name,
+            "updatedAt": updated_at or datetime.now(timezone.utc)
+        }))
+
+    def _fetch(self, since):
+        return [(sid, data) for sid, data in self.records if since is None or data["updatedAt"] >= since]
+
+_index = None
+
+def get_signature_index() -> SignatureIndex:
+    """
+    Process-wide index. SIGNATURE_INDEX=local selects the local backend and
+    SIGNATURE_INDEX_STALENESS_SEC bounds how old a lookup's view may be and
+    SIGNATURE_INDEX_OVERLAP_SEC how late a write may commit after its updatedAt.
+    """
+    global _index
+    if _index is None:
+        staleness = float(os.environ.get("SIGNATURE_INDEX_STALENESS_SEC", "30"))
+        overlap = float(os.environ.get("SIGNATURE_INDEX_OVERLAP_SEC", "60"))
+        if os.environ.get("SIGNATURE_INDEX") == "local":
+            _index = LocalSignatureIndex(max_staleness=staleness, overlap_sec=overlap)
+        else:
+            from firebase_admin import firestore
+            _index = FirestoreSignatureIndex(firestore.client(), max_staleness=staleness, overlap_sec=overlap)
+    return _index
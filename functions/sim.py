@@ -1,68 +1,289 @@
-import pandas as pd
-import numpy as np
+import sys
+import time
+import signal
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
 from config import GAME_CONFIG
+from rules import compile_rules
+from recorder import GameRecord, MoveLog
+
+# --- BITBOARD HELPERS ---
+# Node i lives in bit (i - 1) of a player's bitboard.
+_CHUNK_BITS = 8
+_CHUNK_MASK = (1 << _CHUNK_BITS) - 1
+_chunk_tables = []
+
+def _chunk_table(index):
+    """Lookup table mapping every 8-bit chunk value to the node ids it contains."""
+    while len(_chunk_tables) <= index:
+        base = len(_chunk_tables) * _CHUNK_BITS + 1
+        _chunk_tables.append(tuple(
+            tuple(base + i for i in range(_CHUNK_BITS) if m >> i & 1)
+            for m in range(1 << _CHUNK_BITS)
+        ))
+    return _chunk_tables[index]
+
+def mask_to_nodes(mask):
+    """Expands a bitboard into the ascending list of node ids it contains."""
+    nodes = []
+    tables = _chunk_tables
+    index = 0
+    while mask:
+        table = tables[index] if index < len(tables) else _chunk_table(index)
+        nodes.extend(table[mask & _CHUNK_MASK])
+        mask >>= _CHUNK_BITS
+        index += 1
+    return nodes
+
+class NodeView(list):
+    """
+    List of node ids handed to strategies. It behaves like a normal list,
+    while `in` is answered from a cached frozenset in O(1). The simulator
+    keeps one canonical view per bitboard and hands each strategy call its
+    own copy (see fresh), which shares the frozenset until the strategy
+    modifies its list; from then on that copy answers `in` from the list.
+    `mask` is the bitboard the view was built from, None once modified.
+    """
+    __slots__ = ("members", "mask")
+
+    def __init__(self, nodes=(), mask=None, members=None):
+        list.__init__(self, nodes)
+        self.members = frozenset(self) if members is None else members
+        self.mask = mask
+
+    def fresh(self):
+        """Copy for one strategy call, sharing the membership set (at most 26 ids are copied)."""
+        return NodeView(self, self.mask, self.members)
+
+    def __contains__(self, node):
+        members = self.members
+        if members is None:
+            return list.__contains__(self, node)
+        try:
+            return node in members
+        except TypeError:
+            return list.__contains__(self, node)
+
+def _modifies(name):
+    method = getattr(list, name)
+
+    def modify(self, *args, **kwargs):
+        self.members = None
+        self.mask = None
+        return method(self, *args, **kwargs)
+
+    modify.__name__ = name
+    return modify
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear", "sort", "reverse",
+              "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(NodeView, _name, _modifies(_name))
+
+# --- DATA STRUCTURES ---
+@dataclass(frozen=True)
+class MatchResult:
+    """Final scores and summary counters of a match played without recording."""
+    score_a: int
+    score_b: int
+    energy_a: int
+    energy_b: int
+    rounds: int
+    actions_a: Dict[str, int]
+    actions_b: Dict[str, int]
+    invalid_a: int
+    invalid_b: int
+    # Budgeted games only (see TimeBudget): calls that raised, calls over budget
+    # (plus one for a spent match budget), strategy CPU seconds
+    errors_a: int = 0
+    errors_b: int = 0
+    overruns_a: int = 0
+    overruns_b: int = 0
+    time_a: float = 0.0
+    time_b: float = 0.0
+
+@dataclass(frozen=True)
+class TimeBudget:
+    """
+    Limits for strategy calls in one game. A call that raises or takes longer
+    than call_sec has its move replaced by HARVEST; once a player's calls
+    total match_sec it HARVESTs for the rest of the game without being called
+    (counted as one more overrun). Calls are timed in thread CPU time.
+    A call still running after hang_sec (wall clock) is interrupted with
+    SIGALRM and counted as an overrun; signals only reach a main thread, so
+    elsewhere a hung call is not preempted (see tournament.run_matches).
+    """
+    call_sec: float = 0.05
+    match_sec: float = 2.0
+    hang_sec: float = 1.0
+
+# --- STRATEGY PREEMPTION ---
+class CallInterrupted(BaseException):
+    """Raised inside a strategy call that outlived TimeBudget.hang_sec; not an Exception, so strategies do not catch it."""
+
+# Re-raised at this interval until the call returns
+_HANG_REPEAT_SEC = 0.1
+# Frame of the interruptible_call whose timer is armed (None when disarmed)
+_alarm_caller = None
+# SIGALRM handler found when ours was installed (called while no timer is armed)
+_previous_alarm = None
+_alarm_installed = False
+
+def _raise_interrupted(frame, event, arg):
+    # Not on the 'exception' event of the raise itself: a trace function that raises is removed
+    if _alarm_caller is not None and event != "exception":
+        raise CallInterrupted()
+    return _raise_interrupted
+
+def _on_alarm(signum, frame):
+    if _alarm_caller is None:
+        if callable(_previous_alarm):
+            _previous_alarm(signum, frame)
+        return
+    # Also raise from the next line the strategy runs, so an `except:` cannot swallow it
+    while frame is not None and frame is not _alarm_caller:
+        frame.f_trace = _raise_interrupted
+        frame = frame.f_back
+    sys.settrace(_raise_interrupted)
+    raise CallInterrupted()
+
+def interruptible_call(hang_sec, func, *args):
+    """
+    Calls func with a SIGALRM timer armed for hang_sec, raising CallInterrupted
+    in it if it has not returned by then. Only a process's main thread gets
+    signals, so elsewhere (or without hang_sec) func is simply called.
+    """
+    global _alarm_caller, _previous_alarm, _alarm_installed
+    if (not hang_sec or not hasattr(signal, "setitimer")
+            or threading.current_thread() is not threading.main_thread()):
+        return func(*args)
+    if not _alarm_installed:
+        _previous_alarm = signal.signal(signal.SIGALRM, _on_alarm)
+        _alarm_installed = True
+    previous_trace = sys.gettrace()
+    _alarm_caller = sys._getframe()
+    signal.setitimer(signal.ITIMER_REAL, hang_sec, _HANG_REPEAT_SEC)
+    try:
+        return func(*args)
+    finally:
+        _alarm_caller = None
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        if sys.gettrace() is not previous_trace:
+            sys.settrace(previous_trace)
 
 class GameSimRecorded:
-    def __init__(self, strat_a, strat_b, config=GAME_CONFIG):
+    def __init__(self, strat_a, strat_b, config=GAME_CONFIG, budget: Optional[TimeBudget] = None):
         self.config = config
+        self.rules = compile_rules(config)
         self.strat_a = strat_a
         self.strat_b = strat_b
-        
-        # Initialize State
-        self.nodes = {i: None for i in range(1, self.config["num_nodes"] + 1)}
+        # Without a budget strategy errors propagate; with one they are counted (see guarded_move)
+        self.budget = budget
+        # Strategies that can answer both seats in one call (see strategy_pool.RemoteStrategy);
+        # budgeted games call each seat separately so time and errors are attributed
+        self.paired_moves = getattr(strat_a, "moves_with", None) if budget is None else None
+
+        # Initialize State (one bitboard per player)
+        self.board = {
+            'A': self.rules.bits[self.rules.home['A']],
+            'B': self.rules.bits[self.rules.home['B']]
+        }
         self.energy = {'A': 0, 'B': 0}
-        self.nodes[self.config["home_a"]] = 'A'
-        self.nodes[self.config["home_b"]] = 'B'
+
+        # Running Counters (kept in step with the bitboards by claim_node)
+        self.node_count = {'A': 1, 'B': 1}
+        self.income = {p: self.rules.harvest_yield[p][self.rules.home[p]] for p in ('A', 'B')}
+        self.neighbor_owned = {p: [0] * (self.rules.num_nodes + 1) for p in ('A', 'B')}
+        for p in ('A', 'B'):
+            for nb in self.rules.neighbors[self.rules.home[p]]:
+                self.neighbor_owned[p][nb] += 1
         
-        # Metrics Log
-        self.metrics = {
-            "round": [], "score_a": [], "score_b": [],
-            "energy_a": [], "energy_b": [],
-            "move_a": [], "move_b": [],
-            "nodes_a": [], "nodes_b": []
+        # Summary Counters (always kept, even when not recording)
+        self.rounds_played = 0
+        self.action_counts = {p: {"HARVEST": 0, "EXPAND": 0, "CONQUER": 0} for p in ('A', 'B')}
+        self.invalid_moves = {'A': 0, 'B': 0}
+        self.errors = {'A': 0, 'B': 0}
+        self.overruns = {'A': 0, 'B': 0}
+        self.strategy_time = {'A': 0.0, 'B': 0.0}
+        self.exhausted = {'A': False, 'B': False}
+
+        # Strategy Views (NodeView per bitboard, reused while the board is unchanged)
+        self.view_cache = {}
+
+        # Metrics Log (allocated only when the game is recorded)
+        self.record = None
+        self.move_log = None
+
+    @property
+    def nodes(self):
+        """Legacy {node: owner} view of the board, derived from the bitboards."""
+        bits = self.rules.bits
+        return {
+            i: 'A' if self.board['A'] & bits[i] else 'B' if self.board['B'] & bits[i] else None
+            for i in self.rules.node_ids
         }
 
     def get_neighbors(self, node_id):
-        n = self.config["num_nodes"]
-        prev_n = node_id - 1 if node_id > 1 else n
-        next_n = node_id + 1 if node_id < n else 1
-        return [prev_n, next_n]
+        return self.rules.neighbors[self.rules.node_ids[node_id]]
 
     def get_node_cost(self, node_id, mode="EXPAND"):
         """Centralized cost calculator to prevent inconsistencies."""
-        is_power = node_id in self.config["power_nodes"]
+        node = self.rules.node_ids[node_id]
         if mode == "EXPAND":
-            return self.config["cost_expand_power"] if is_power else self.config["cost_expand_normal"]
+            return self.rules.expand_cost[node]
         if mode == "CONQUER":
-            return self.config["cost_conquer_power_base"] if is_power else self.config["cost_conquer_normal_base"]
+            return self.rules.conquer_cost[node]
         return 0
 
     def calculate_defense(self, target_node, defender_id):
-        bonus = 0
-        for n in self.get_neighbors(target_node):
-            if self.nodes[n] == defender_id:
-                bonus += self.config["defense_bonus_per_neighbor"]
-        return bonus
+        return self.neighbor_owned[defender_id][self.rules.node_ids[target_node]] * self.rules.defense_bonus
+
+    def node_view(self, mask):
+        """Canonical NodeView of a bitboard, built once per distinct mask (strategies get fresh() copies)."""
+        view = self.view_cache.get(mask)
+        if view is None:
+            if len(self.view_cache) >= 64:
+                self.view_cache.clear()
+            view = self.view_cache[mask] = NodeView(mask_to_nodes(mask), mask)
+        return view
 
     def get_view(self, player_id):
-        free = [k for k, v in self.nodes.items() if v is None]
-        mine = [k for k, v in self.nodes.items() if v == player_id]
         opp_id = 'B' if player_id == 'A' else 'A'
-        opp = [k for k, v in self.nodes.items() if v == opp_id]
-        return free, opp, mine, self.energy[player_id]
+        mine_mask = self.board[player_id]
+        opp_mask = self.board[opp_id]
+        free_mask = self.rules.full_mask & ~(mine_mask | opp_mask)
+        return (
+            self.node_view(free_mask).fresh(), self.node_view(opp_mask).fresh(),
+            self.node_view(mine_mask).fresh(), self.energy[player_id]
+        )
 
     def resolve_harvest(self, player_id):
-        income = 0
-        home_node = self.config["home_a"] if player_id == 'A' else self.config["home_b"]
-        for n, owner in self.nodes.items():
-            if owner == player_id:
-                if n == home_node: 
-                    income += self.config["harvest_home"]
-                elif n in self.config["power_nodes"]: 
-                    income += self.config["harvest_power"]
-                else: 
-                    income += self.config["harvest_normal"]
-        return income
+        return self.income[player_id]
+
+    def claim_node(self, node_id, player_id):
+        """
+        Transfers a node to player_id, clearing it from the opponent's bitboard
+        and updating node counts, income and neighbour counts in O(1).
+        """
+        rules = self.rules
+        bit = rules.bits[node_id]
+        if self.board[player_id] & bit:
+            return
+        self.board[player_id] |= bit
+        self.node_count[player_id] += 1
+        self.income[player_id] += rules.harvest_yield[player_id][node_id]
+        owned = self.neighbor_owned[player_id]
+        for nb in rules.neighbors[node_id]:
+            owned[nb] += 1
+
+        opp_id = 'B' if player_id == 'A' else 'A'
+        if self.board[opp_id] & bit:
+            self.board[opp_id] &= ~bit
+            self.node_count[opp_id] -= 1
+            self.income[opp_id] -= rules.harvest_yield[opp_id][node_id]
+            owned = self.neighbor_owned[opp_id]
+            for nb in rules.neighbors[node_id]:
+                owned[nb] -= 1
 
     def validate_move(self, move, player_id, free, opp, energy):
         if not move or not isinstance(move, list): return False
@@ -75,18 +296,18 @@ class GameSimRecorded:
             return False
 
         if action == "EXPAND":
-            cost = self.get_node_cost(target, "EXPAND")
-            return target in free and energy >= cost
+            return target in free and energy >= self.get_node_cost(target, "EXPAND")
             
         if action == "CONQUER":
-            # Protect Home Bases
-            if target in [self.config["home_a"], self.config["home_b"]]:
-                return False
             if target not in opp:
                 return False 
+            # Protect Home Bases
+            node = self.rules.node_ids[target]
+            if self.rules.bits[node] & self.rules.protected_mask:
+                return False
                 
             opp_id = 'B' if player_id == 'A' else 'A'
-            total_cost = self.get_node_cost(target, "CONQUER") + self.calculate_defense(target, opp_id)
+            total_cost = self.rules.conquer_cost[node] + self.calculate_defense(node, opp_id)
             return energy >= total_cost
 
         return False
@@ -97,26 +318,80 @@ class GameSimRecorded:
         free_b, opp_b, mine_b, eng_b = self.get_view('B')
         
         # 2. Collect and Validate moves
-        move_a = self.strat_a(free_a, opp_a, mine_a, eng_a)
-        move_b = self.strat_b(free_b, opp_b, mine_b, eng_b)
+        moves = None
+        if self.paired_moves is not None:
+            moves = self.paired_moves(self.strat_b, (free_a, opp_a, mine_a, eng_a), (free_b, opp_b, mine_b, eng_b))
+        if self.budget is not None:
+            move_a = self.guarded_move('A', self.strat_a, free_a, opp_a, mine_a, eng_a)
+            move_b = self.guarded_move('B', self.strat_b, free_b, opp_b, mine_b, eng_b)
+        elif moves is None:
+            move_a = self.strat_a(free_a, opp_a, mine_a, eng_a)
+            move_b = self.strat_b(free_b, opp_b, mine_b, eng_b)
+        else:
+            move_a, move_b = moves
+
+        if not self.validate_move(move_a, 'A', free_a, opp_a, eng_a):
+            move_a = ["HARVEST"]
+            self.invalid_moves['A'] += 1
+        if not self.validate_move(move_b, 'B', free_b, opp_b, eng_b):
+            move_b = ["HARVEST"]
+            self.invalid_moves['B'] += 1
+
+        # 3-4. Resolve
+        self.apply_moves(move_a, move_b)
+
+        # 5. Record state
+        self.record_round(round_num, move_a, move_b)
+
+    def guarded_move(self, player_id, strategy, free, opp, mine, energy):
+        """Calls a strategy under self.budget; errors, slow calls and an exhausted budget yield HARVEST."""
+        if self.strategy_time[player_id] >= self.budget.match_sec:
+            if not self.exhausted[player_id]:
+                self.exhausted[player_id] = True
+                self.overruns[player_id] += 1
+            return ["HARVEST"]
+        start = time.thread_time()
+        failed = interrupted = False
+        try:
+            move = interruptible_call(self.budget.hang_sec, strategy, free, opp, mine, energy)
+        except CallInterrupted:
+            interrupted = True
+        except Exception:
+            failed = True
+        elapsed = time.thread_time() - start
+        self.strategy_time[player_id] += elapsed
+        if failed:
+            self.errors[player_id] += 1
+            return ["HARVEST"]
+        if interrupted or elapsed > self.budget.call_sec:
+            self.overruns[player_id] += 1
+            return ["HARVEST"]
+        return move
 
-        if not self.validate_move(move_a, 'A', free_a, opp_a, eng_a): move_a = ["HARVEST"]
-        if not self.validate_move(move_b, 'B', free_b, opp_b, eng_b): move_b = ["HARVEST"]
+    def apply_moves(self, move_a, move_b):
+        """Resolves one round of already-validated moves against the board."""
+        # Fast path: both harvest, the board is untouched
+        if move_a[0] == "HARVEST" and move_b[0] == "HARVEST":
+            self.energy['A'] += self.income['A']
+            self.energy['B'] += self.income['B']
+            return
 
+        rules = self.rules
+        target_a = rules.node_ids[move_a[1]] if move_a[0] != "HARVEST" else None
+        target_b = rules.node_ids[move_b[1]] if move_b[0] != "HARVEST" else None
         resolved = {'A': False, 'B': False}
 
         # 3. Resolve Expansion Collisions (Highest Energy Wins)
-        if move_a[0] == "EXPAND" and move_b[0] == "EXPAND" and move_a[1] == move_b[1]:
-            target = move_a[1]
-            cost = self.get_node_cost(target, "EXPAND")
-            penalty = self.config["collision_penalty"]
+        if move_a[0] == "EXPAND" and move_b[0] == "EXPAND" and target_a == target_b:
+            cost = rules.expand_cost[target_a]
+            penalty = rules.collision_penalty
 
             if self.energy['A'] > self.energy['B']:
-                self.nodes[target] = 'A'
+                self.claim_node(target_a, 'A')
                 self.energy['A'] -= cost
                 self.energy['B'] = max(0, self.energy['B'] - penalty)
             elif self.energy['B'] > self.energy['A']:
-                self.nodes[target] = 'B'
+                self.claim_node(target_a, 'B')
                 self.energy['B'] -= cost
                 self.energy['A'] = max(0, self.energy['A'] - penalty)
             else:
@@ -127,7 +402,7 @@ class GameSimRecorded:
             resolved['A'] = resolved['B'] = True
 
         # 4. Resolve Independent Actions
-        for p, move in [('A', move_a), ('B', move_b)]:
+        for p, move, target in [('A', move_a, target_a), ('B', move_b, target_b)]:
             if resolved[p]: continue
                 
             action = move[0]
@@ -135,33 +410,101 @@ class GameSimRecorded:
                 self.energy[p] += self.resolve_harvest(p)
                 
             elif action == "EXPAND":
-                target = move[1]
-                self.nodes[target] = p
-                self.energy[p] -= self.get_node_cost(target, "EXPAND")
+                self.claim_node(target, p)
+                self.energy[p] -= rules.expand_cost[target]
                 
             elif action == "CONQUER":
-                target = move[1]
                 opp_id = 'B' if p == 'A' else 'A'
-                total_cost = self.get_node_cost(target, "CONQUER") + self.calculate_defense(target, opp_id)
-                self.nodes[target] = p
+                total_cost = rules.conquer_cost[target] + self.calculate_defense(target, opp_id)
+                self.claim_node(target, p)
                 self.energy[p] -= total_cost
 
-        # 5. Record state
-        self.metrics["round"].append(round_num)
-        self.metrics["score_a"].append(len([v for v in self.nodes.values() if v == 'A']))
-        self.metrics["score_b"].append(len([v for v in self.nodes.values() if v == 'B']))
-        self.metrics["energy_a"].append(self.energy['A'])
-        self.metrics["energy_b"].append(self.energy['B'])
-        self.metrics["move_a"].append(move_a[0])
-        self.metrics["move_b"].append(move_b[0])
-        self.metrics["nodes_a"].append([k for k, v in self.nodes.items() if v == 'A'])
-        self.metrics["nodes_b"].append([k for k, v in self.nodes.items() if v == 'B'])
-
-    def play_game(self):
-        for r in range(1, self.config["max_rounds"] + 1):
+    def record_round(self, round_num, move_a, move_b):
+        self.rounds_played = round_num
+        self.action_counts['A'][move_a[0]] += 1
+        self.action_counts['B'][move_b[0]] += 1
+        if self.record is not None:
+            self.record.append(
+                round_num, self.node_count['A'], self.node_count['B'],
+                self.energy['A'], self.energy['B'], move_a[0], move_b[0],
+                self.board['A'], self.board['B']
+            )
+        if self.move_log is not None:
+            node_ids = self.rules.node_ids
+            self.move_log.append(
+                move_a[0], node_ids[move_a[1]] if move_a[0] != "HARVEST" else 0,
+                move_b[0], node_ids[move_b[1]] if move_b[0] != "HARVEST" else 0
+            )
+
+    def result(self) -> MatchResult:
+        return MatchResult(
+            score_a=self.node_count['A'],
+            score_b=self.node_count['B'],
+            energy_a=self.energy['A'],
+            energy_b=self.energy['B'],
+            rounds=self.rounds_played,
+            actions_a=dict(self.action_counts['A']),
+            actions_b=dict(self.action_counts['B']),
+            invalid_a=self.invalid_moves['A'],
+            invalid_b=self.invalid_moves['B'],
+            errors_a=self.errors['A'],
+            errors_b=self.errors['B'],
+            overruns_a=self.overruns['A'],
+            overruns_b=self.overruns['B'],
+            time_a=self.strategy_time['A'],
+            time_b=self.strategy_time['B']
+        )
+
+    def play_recorded(self) -> GameRecord:
+        """Plays every round into a columnar GameRecord (no pandas involved)."""
+        self.record = GameRecord.for_config(self.config)
+        for r in range(1, self.rules.max_rounds + 1):
             self.run_round(r)
-        return pd.DataFrame(self.metrics)
+        return self.record
+
+    def play_logged(self) -> MoveLog:
+        """
+        Plays every round keeping only the compact log of validated moves.
+        The summary is still available from result(); any round can be
+        rebuilt later with replay_game.
+        """
+        self.move_log = MoveLog(self.rules.digest)
+        for r in range(1, self.rules.max_rounds + 1):
+            self.run_round(r)
+        return self.move_log
+
+    def play_game(self, record=True):
+        """
+        Plays every round. With record=True returns the per-round metrics as a
+        DataFrame; with record=False nothing is logged per round and only the
+        MatchResult summary is returned (pandas is never imported).
+        """
+        if record:
+            return self.play_recorded().to_frame()
+
+        for r in range(1, self.rules.max_rounds + 1):
+            self.run_round(r)
+        return self.result()
+
+def replay_game(move_log, config=GAME_CONFIG, until=None, record=False):
+    """
+    Rebuilds a game from its MoveLog without calling any strategy.
+    Returns the simulator positioned after round `until` (default: the last
+    logged round), so ownership (nodes/board), energy, node_count and
+    result() describe that round. With record=True the replayed rounds are
+    also written to sim.record, whose to_frame() is the full metrics frame.
+    """
+    sim = GameSimRecorded(None, None, config)
+    if move_log.rules_digest != sim.rules.digest:
+        raise ValueError("Move log was recorded under a different ruleset.")
+    if record:
+        sim.record = GameRecord.for_config(config)
 
+    last = len(move_log) if until is None else min(until, len(move_log))
+    for r, (move_a, move_b) in enumerate(move_log.moves(last), 1):
+        sim.apply_moves(move_a, move_b)
+        sim.record_round(r, move_a, move_b)
+    return sim
 
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+import random
+import hashlib
+from typing import Dict, Iterable, List, Set, Tuple
+import numpy as np
+
+from sim import GameSimRecorded
+from signature_check import tester_strat_a, tester_strat_b
+from match_rng import with_rng
+
+# --- PROBE OPPONENTS ---
+# The candidate plays A against each of these; all are deterministic.
+def probe_harvester(free, opp, mine, energy):
+    return ["HARVEST"]
+
+def probe_raider(free, opp, mine, energy):
+    # Attacks the opponent's lowest node when rich, otherwise grabs the highest free one
+    if opp and energy >= 40:
+        return ["CONQUER", min(opp)]
+    if free and energy >= 15:
+        return ["EXPAND", max(free)]
+    return ["HARVEST"]
+
+PROBES = (tester_strat_a, tester_strat_b, probe_harvester, probe_raider)
+
+# --- MINHASH / LSH PARAMETERS ---
+SHINGLE = 3             # Run tokens per shingle
+NUM_PERM = 128
+BANDS = 64
+ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+# Bumped whenever shingling or hashing changes; sketches of other versions
+# are not comparable (v2: shingle windows are hash-chained instead of
+# shifted into 64 bits, which overflowed and dropped the first token).
+FINGERPRINT_VERSION = 2
+
+# Fixed hash family: h_i(x) = (a_i * x + b_i) mod P over 32-bit shingle ids.
+# a_i < 2^29 keeps a_i * x below 2^61, so everything stays in uint64.
+_rng = np.random.default_rng(20260115)
+_A = _rng.integers(1, 1 << 29, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, size=NUM_PERM, dtype=np.uint64)
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """splitmix64 finaliser: spreads every input bit over the 64-bit output."""
+    with np.errstate(over="ignore"):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def _run_tokens(codes: np.ndarray) -> np.ndarray:
+    """
+    Run-length tokens of a move-code sequence: (code << 8) | bit length of
+    the run. Long identical stretches (a board-full HARVEST tail) become one
+    token instead of dominating the shingle set.
+    """
+    if len(codes) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    codes = codes.astype(np.uint64)
+    starts = np.r_[0, np.flatnonzero(codes[1:] != codes[:-1]) + 1]
+    lengths = np.diff(np.r_[starts, len(codes)])
+    return (codes[starts] << np.uint64(8)) | np.frexp(lengths)[1].astype(np.uint64)
+
+def _shingles(codes: np.ndarray, probe_id: int) -> np.ndarray:
+    """
+    32-bit ids of the (probe, SHINGLE consecutive run tokens, occurrence)
+    windows of a move-code sequence. Numbering repeated windows keeps the
+    multiset, so a pattern played five times differs from one played once.
+    """
+    codes = _run_tokens(codes)
+    k = min(SHINGLE, len(codes))
+    if k == 0:
+        return np.zeros(0, dtype=np.uint64)
+    windows = len(codes) - k + 1
+    x = np.zeros(windows, dtype=np.uint64)
+    for offset in range(k):
+        x = _mix(x) ^ codes[offset:offset + windows]
+    # Occurrence number of each window among equal windows seen before it
+    order = np.argsort(x, kind="stable")
+    sorted_x = x[order]
+    starts = np.r_[0, np.flatnonzero(sorted_x[1:] != sorted_x[:-1]) + 1]
+    runs = np.diff(np.r_[starts, windows])
+    occurrence = np.empty(windows, dtype=np.uint64)
+    occurrence[order] = np.arange(windows, dtype=np.uint64) - np.repeat(starts, runs).astype(np.uint64)
+    x = _mix(x ^ _mix(occurrence + np.uint64(probe_id << 16)))
+    return np.unique(x & np.uint64(0xFFFFFFFF))
+
+def behaviour_shingles(strategy_func, seed=42) -> np.ndarray:
+    """
+    Shingle ids of the strategy's validated moves (action and target) against
+    every probe. Each probe game gives the strategy its own Random(seed)
+    (see signature_check.probe_strategy_signature).
+    """
+    parts = []
+    for probe_id, probe in enumerate(PROBES):
+        random.seed(seed)
+        np.random.seed(seed)
+        try:
+            move_log = GameSimRecorded(with_rng(strategy_func, random.Random(seed)), probe).play_logged()
+            codes = np.frombuffer(move_log.to_bytes(), dtype="<u2")[0::2]
+        except Exception:
+            codes = np.zeros(0, dtype=np.uint16)
+        parts.append(_shingles(codes, probe_id))
+    return np.unique(np.concatenate(parts))
+
+def minhash(shingles: np.ndarray) -> List[int]:
+    """NUM_PERM-value MinHash sketch of a shingle set (all _PRIME for an empty set)."""
+    if len(shingles) == 0:
+        return [_PRIME] * NUM_PERM
+    hashed = (_A[:, None] * shingles[None, :] + _B[:, None]) % np.uint64(_PRIME)
+    return hashed.min(axis=1).tolist()
+
+def fingerprint(strategy_func) -> List[int]:
+    """Behavioural MinHash fingerprint of a strategy over all probe games."""
+    return minhash(behaviour_shingles(strategy_func))
+
+def similarity(sketch_a: List[int], sketch_b: List[int]) -> float:
+    """Estimated Jaccard similarity of the two behaviours (share of equal sketch values)."""
+    return sum(a == b for a, b in zip(sketch_a, sketch_b)) / NUM_PERM
+
+def band_keys(sketch: List[int]) -> List[str]:
+    """One bucket key per band of ROWS sketch values."""
+    keys = []
+    for band in range(BANDS):
+        rows = np.asarray(sketch[band * ROWS:(band + 1) * ROWS], dtype="<u8").tobytes()
+        keys.append(f"{band}:{hashlib.blake2b(rows, digest_size=8).hexdigest()}")
+    return keys
+
+# --- BANDED INDEX ---
+class LSHIndex:
+    """
+    Sketches bucketed by band. Two strategies become candidates when any
+    band matches exactly; with 64 bands of 2 rows that catches pairs above
+    roughly 0.3 similarity almost surely while unrelated strategies (~0.05)
+    rarely collide, so a lookup does not scan all sketches.
+    """
+
+    def __init__(self):
+        self.sketches: Dict[str, List[int]] = {}
+        self.buckets: Dict[str, Set[str]] = {}
+
+    def add(self, key: str, sketch: List[int]) -> None:
+        self.remove(key)
+        self.sketches[key] = sketch
+        for band in band_keys(sketch):
+            self.buckets.setdefault(band, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        sketch = self.sketches.pop(key, None)
+        if sketch is None:
+            return
+        for band in band_keys(sketch):
+            members = self.buckets.get(band)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self.buckets[band]
+
+    def candidates(self, sketch: List[int]) -> Set[str]:
+        found = set()
+        for band in band_keys(sketch):
+            found |= self.buckets.get(band, set())
+        return found
+
+    def query(self, sketch: List[int], exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """(key, similarity) of every candidate, most similar first."""
+        skip = set(exclude)
+        scored = [(key, similarity(sketch, self.sketches[key])) for key in self.candidates(sketch) if key not in skip]
+        return sorted(scored, key=lambda item: item[1], reverse=True)
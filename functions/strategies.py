@@ -1,8 +1,6 @@
 # strategies.py
-import random
-
-# set random seed as 42
-random.seed(42)
+# Per-match RNG proxy (see match_rng): in league matches each bot draws from its own seeded RNG
+from match_rng import random
 
 # --- HELPER: Safe Target Filter ---
 def get_valid_targets(targets):
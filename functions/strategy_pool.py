@@ -0,0 +1,457 @@
+import os
+import time
+import queue
+import select
+import marshal
+import numbers
+import threading
+import multiprocessing
+from typing import Dict, Iterable, List, Optional
+
+from loader import load_strategy, precompile, StrategyRejected
+from match_store import code_hash
+from sim import NodeView, mask_to_nodes
+from match_rng import seat_rng, call_with_rng
+
+# --- LIMITS ---
+# Wall-clock seconds the parent waits for one round trip before killing the worker
+CALL_TIMEOUT_SEC = float(os.environ.get("STRATEGY_CALL_TIMEOUT_SEC", "1.0"))
+# CPU seconds a worker may spend per match (RLIMIT_CPU, reset when a match starts)
+MATCH_CPU_SEC = int(os.environ.get("STRATEGY_MATCH_CPU_SEC", "10"))
+# Address space a worker may grow by beyond what it inherited at fork (RLIMIT_AS)
+WORKER_MEMORY_MB = int(os.environ.get("STRATEGY_WORKER_MEMORY_MB", "256"))
+# Matches a worker serves before it is replaced by a fresh one
+MAX_MATCHES_PER_WORKER = int(os.environ.get("STRATEGY_MAX_MATCHES_PER_WORKER", "200"))
+
+class StrategyError(Exception):
+    """A strategy raised inside a worker; the worker itself is still usable."""
+
+    def __init__(self, message, key=None):
+        super().__init__(message)
+        self.key = key
+
+class StrategyViolation(Exception):
+    """A strategy hung, crashed its worker or hit a limit; the worker is recycled."""
+
+    def __init__(self, message, key=None):
+        super().__init__(message)
+        self.key = key
+
+class StrategyTimeout(StrategyViolation):
+    """No answer within the per-call wall-clock budget."""
+
+# --- WORKER PROCESS ---
+# Messages are marshalled tuples over a Pipe (no pickle):
+#   ("begin", seed, key_a, key_b)         -> ("ok",)
+#   ("load", key, source)                  -> ("ok",)
+#   ("moves", ((seat, free, opp, mine, energy), ...))
+#                                          -> ("ok", moves, compute seconds)
+#                                           | ("err", index, message)
+#                                           | ("violation", index, message)
+#   ("stop",)
+# Seat 0/1 names the strategies of the current match, each drawing from its
+# own match_rng.seat_rng; views travel as bitboard masks and are rebuilt as
+# NodeViews in the worker.
+
+def _address_space() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+def _apply_memory_limit(memory_mb):
+    try:
+        import resource
+    except ImportError:
+        return
+    current = _address_space()
+    if not memory_mb or current is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = current + memory_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+def _reset_cpu_budget(cpu_sec):
+    """Moves the soft RLIMIT_CPU to `cpu_sec` past the CPU time used so far (SIGXCPU ends the worker)."""
+    try:
+        import resource
+    except ImportError:
+        return
+    if not cpu_sec:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    limit = int(usage.ru_utime + usage.ru_stime) + 1 + cpu_sec
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+
+def _portable(move):
+    """A move as marshal-able plain values; anything else becomes None (an invalid move)."""
+    if not isinstance(move, (list, tuple)):
+        return None
+    items = []
+    for x in move:
+        if type(x) in (str, int, float, bool) or x is None:
+            items.append(x)
+        elif isinstance(x, str):
+            items.append(str(x))
+        elif isinstance(x, numbers.Integral):
+            items.append(int(x))
+        elif isinstance(x, numbers.Real):
+            items.append(float(x))
+        else:
+            items.append(None)
+    return items if isinstance(move, list) else tuple(items)
+
+def _serve(conn, sources, limits, current):
+    """Worker loop: loads strategies on first use and answers move batches."""
+    cpu_sec, memory_mb = limits
+    _apply_memory_limit(memory_mb)
+    _reset_cpu_budget(cpu_sec)
+    funcs = {}
+    views = {}
+    seats = (None, None)
+    rngs = (None, None)
+
+    def view(mask):
+        v = views.get(mask)
+        if v is None:
+            if len(views) >= 256:
+                views.clear()
+            v = views[mask] = NodeView(mask_to_nodes(mask), mask)
+        return v.fresh()
+
+    while True:
+        try:
+            msg = marshal.loads(conn.recv_bytes())
+        except (EOFError, OSError):
+            return
+        op = msg[0]
+        if op == "stop":
+            return
+        if op == "begin":
+            seats = (msg[2], msg[3])
+            if msg[1] is not None:
+                rngs = (seat_rng(msg[1], 'A', msg[2]), seat_rng(msg[1], 'B', msg[3]))
+            else:
+                rngs = (None, None)
+            _reset_cpu_budget(cpu_sec)
+            conn.send_bytes(marshal.dumps(("ok",)))
+            continue
+        if op == "load":
+            sources[msg[1]] = msg[2]
+            conn.send_bytes(marshal.dumps(("ok",)))
+            continue
+
+        index = 0
+        try:
+            moves = []
+            start = time.perf_counter()
+            for index, (seat, free, opp, mine, energy) in enumerate(msg[1]):
+                current.value = index
+                key = seats[seat]
+                func = funcs.get(key)
+                if func is None:
+                    func, error = load_strategy(sources[key], key[:12])
+                    if func is None:
+                        raise StrategyRejected(error or "No valid strategy function.")
+                    funcs[key] = func
+                moves.append(_portable(call_with_rng(rngs[seat], func, view(free), view(opp), view(mine), energy)))
+            elapsed = time.perf_counter() - start
+            current.value = -1
+            reply = ("ok", moves, elapsed)
+        except MemoryError:
+            # State may be half-built; report and exit so the pool starts a fresh worker
+            conn.send_bytes(marshal.dumps(("violation", index, "Memory limit exceeded.")))
+            return
+        except Exception as e:
+            current.value = -1
+            reply = ("err", index, f"{type(e).__name__}: {e}")
+        conn.send_bytes(marshal.dumps(reply))
+
+def _mask(view) -> int:
+    mask = getattr(view, "mask", None)
+    if mask is None:
+        mask = 0
+        for node in view:
+            mask |= 1 << (node - 1)
+    return mask
+
+# --- PARENT SIDE ---
+class _Worker:
+    """Handle of one worker process and its pipe."""
+
+    def __init__(self, ctx, sources, limits):
+        self.conn, child_conn = ctx.Pipe()
+        self.current = ctx.RawValue("i", -1)   # Batch index being computed (shared memory, no IPC)
+        self.process = ctx.Process(target=_serve, args=(child_conn, sources, limits, self.current), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.known = set(sources)
+        self.poller = None
+        if hasattr(select, "poll"):
+            # Reused poll object: much cheaper per call than Connection.poll(timeout)
+            self.poller = select.poll()
+            self.poller.register(self.conn.fileno(), select.POLLIN)
+        self.matches = 0
+        self.alive = True
+
+    def request(self, msg, timeout):
+        """One round trip; raises StrategyTimeout or StrategyViolation and kills the worker on failure."""
+        try:
+            self.conn.send_bytes(marshal.dumps(msg))
+            ready = self.poller.poll(timeout * 1000) if self.poller is not None else self.conn.poll(timeout)
+            if not ready:
+                self.kill()
+                raise StrategyTimeout(f"No answer within {timeout:g}s.")
+            return marshal.loads(self.conn.recv_bytes())
+        except (EOFError, OSError):
+            self.kill()
+            raise StrategyViolation("Worker exited (CPU or memory limit, or crash).")
+
+    def kill(self):
+        self.alive = False
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+    def stop(self):
+        if not self.alive:
+            return
+        try:
+            self.conn.send_bytes(marshal.dumps(("stop",)))
+        except OSError:
+            pass
+        self.process.join(1)
+        self.kill()
+
+class RemoteStrategy:
+    """Drop-in strategy callable answered by the worker of a MatchSession."""
+    __slots__ = ("session", "key", "seat")
+
+    def __init__(self, session, key, seat):
+        self.session = session
+        self.key = key
+        self.seat = seat
+
+    def __call__(self, free, opp, mine, energy):
+        return self.session.moves(((self.seat, _mask(free), _mask(opp), _mask(mine), energy),))[0]
+
+    def moves_with(self, other, view_a, view_b):
+        """Both seats' moves in one round trip when `other` runs in the same session (see GameSimRecorded.run_round)."""
+        if not isinstance(other, RemoteStrategy) or other.session is not self.session:
+            return None
+        free_a, opp_a, mine_a, eng_a = view_a
+        free_b, opp_b, mine_b, eng_b = view_b
+        return self.session.moves((
+            (self.seat, _mask(free_a), _mask(opp_a), _mask(mine_a), eng_a),
+            (other.seat, _mask(free_b), _mask(opp_b), _mask(mine_b), eng_b)
+        ))
+
+class MatchSession:
+    """
+    One match on one worker, held exclusively until the session ends.
+    Used as a context manager yielding the two RemoteStrategy callables.
+    """
+
+    def __init__(self, pool, worker, key_a, key_b):
+        self.pool = pool
+        self.worker = worker
+        self.strat_a = RemoteStrategy(self, key_a, 0)
+        self.strat_b = RemoteStrategy(self, key_b, 1)
+        self.keys = (key_a, key_b)
+        self.calls = 0
+        self.round_trips = 0
+        self.wall_sec = 0.0
+        self.compute_sec = 0.0
+
+    def moves(self, requests) -> List:
+        if not self.worker.alive:
+            raise StrategyViolation("Worker was recycled after an earlier violation.")
+        start = time.perf_counter()
+        try:
+            reply = self.worker.request(("moves", requests), self.pool.call_timeout)
+        except StrategyViolation as e:
+            index = self.worker.current.value
+            e.key = self.keys[requests[index][0]] if 0 <= index < len(requests) else None
+            raise
+        self.wall_sec += time.perf_counter() - start
+        self.round_trips += 1
+
+        status = reply[0]
+        if status == "ok":
+            self.calls += len(requests)
+            self.compute_sec += reply[2]
+            return reply[1]
+        key = self.keys[requests[reply[1]][0]]
+        if status == "violation":
+            self.worker.kill()
+            raise StrategyViolation(reply[2], key)
+        raise StrategyError(reply[2], key)
+
+    def __enter__(self):
+        return self.strat_a, self.strat_b
+
+    def __exit__(self, *exc):
+        self.pool._release(self)
+        return False
+
+class StrategyPool:
+    """
+    Long-lived worker processes that run uploaded strategies outside this
+    process, under CPU and memory rlimits.
+
+    Sources are compiled and screened here (see loader.precompile) before
+    the workers fork, so workers inherit the compiled code and only execute
+    it on first use. A match holds one worker for both strategies and asks
+    for both seats' moves in one round trip per round. Workers are replaced
+    after `max_matches` matches and after any violation (timeout, crash,
+    CPU or memory limit).
+
+        pool = StrategyPool([code_a, code_b], size=2)
+        with pool.match(code_hash(code_a), code_hash(code_b), seed=1) as (strat_a, strat_b):
+            result = GameSimRecorded(strat_a, strat_b).play_game(record=False)
+    """
+
+    def __init__(self, sources: Iterable[str] = (), size=1, max_matches=MAX_MATCHES_PER_WORKER,
+                 call_timeout=CALL_TIMEOUT_SEC, cpu_sec=MATCH_CPU_SEC, memory_mb=WORKER_MEMORY_MB):
+        methods = multiprocessing.get_all_start_methods()
+        self.ctx = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self.max_matches = max_matches
+        self.call_timeout = call_timeout
+        self.limits = (cpu_sec, memory_mb)
+        self.sources: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.idle = queue.Queue()
+        self.workers = []
+        self.closed = False
+        self.counters = {"matches": 0, "calls": 0, "round_trips": 0, "wall_sec": 0.0, "compute_sec": 0.0, "recycled": 0}
+
+        for source in sources:
+            self.add(source)
+        for _ in range(size):
+            self._spawn()
+
+    def add(self, source_code: str) -> str:
+        """Registers a strategy source and returns its key (the code hash). Rejected code raises here."""
+        compiled = precompile(source_code)
+        if compiled.error is not None:
+            raise compiled.error.with_traceback(None)
+        if compiled.screening.errors:
+            raise StrategyRejected(" ".join(compiled.screening.errors))
+        key = code_hash(source_code)
+        with self.lock:
+            self.sources[key] = source_code
+        return key
+
+    def _spawn(self):
+        with self.lock:
+            worker = _Worker(self.ctx, dict(self.sources), self.limits)
+            self.workers.append(worker)
+        self.idle.put(worker)
+
+    def match(self, key_a: str, key_b: str, seed: Optional[int] = None) -> MatchSession:
+        """
+        Session for one match; blocks until a worker is free. With a match
+        seed (see tournament.match_seed) each seat draws from
+        match_rng.seat_rng(seed, seat, code hash), as in play_match.
+        """
+        if self.closed:
+            raise RuntimeError("Strategy pool is closed.")
+        for key in (key_a, key_b):
+            if key not in self.sources:
+                raise KeyError(f"Unknown strategy {key}; add() its source first.")
+
+        worker = self.idle.get()
+        session = MatchSession(self, worker, key_a, key_b)
+        try:
+            for key in {key_a, key_b} - worker.known:
+                worker.request(("load", key, self.sources[key]), self.call_timeout)
+                worker.known.add(key)
+            worker.request(("begin", seed, key_a, key_b), self.call_timeout)
+        except StrategyViolation:
+            self._release(session)
+            raise
+        return session
+
+    def _release(self, session: MatchSession):
+        worker = session.worker
+        worker.matches += 1
+        with self.lock:
+            c = self.counters
+            c["matches"] += 1
+            c["calls"] += session.calls
+            c["round_trips"] += session.round_trips
+            c["wall_sec"] += session.wall_sec
+            c["compute_sec"] += session.compute_sec
+
+        if worker.alive and worker.matches < self.max_matches:
+            self.idle.put(worker)
+            return
+        worker.stop()
+        with self.lock:
+            self.workers.remove(worker)
+            self.counters["recycled"] += 1
+        if not self.closed:
+            self._spawn()
+
+    def stats(self) -> Dict:
+        """Counters plus mean round-trip time and IPC overhead (round trip minus strategy time) in microseconds."""
+        with self.lock:
+            c = dict(self.counters)
+        trips = max(c["round_trips"], 1)
+        c["mean_round_trip_us"] = c["wall_sec"] / trips * 1e6
+        c["mean_overhead_us"] = (c["wall_sec"] - c["compute_sec"]) / trips * 1e6
+        return c
+
+    def close(self):
+        self.closed = True
+        with self.lock:
+            workers = list(self.workers)
+            self.workers = []
+        for worker in workers:
+            worker.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+if __name__ == "__main__":
+    # IPC overhead benchmark: the same matches in-process and through the pool
+    from sim import GameSimRecorded
+
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "strategies.py"), encoding="utf-8") as f:
+        # Loaded strategies may only import `random` itself (which binds the same proxy)
+        bots = f.read().replace("from match_rng import random", "import random")
+    source_a = bots + "\nstrategy = strat_sniper\n"
+    source_b = bots + "\nstrategy = strat_hoarder\n"
+    func_a, _ = load_strategy(source_a)
+    func_b, _ = load_strategy(source_b)
+
+    matches = 20
+    start = time.perf_counter()
+    for _ in range(matches):
+        GameSimRecorded(func_a, func_b).play_game(record=False)
+    local_sec = time.perf_counter() - start
+
+    with StrategyPool([source_a, source_b]) as pool:
+        key_a, key_b = code_hash(source_a), code_hash(source_b)
+        start = time.perf_counter()
+        for i in range(matches):
+            with pool.match(key_a, key_b, seed=i) as (strat_a, strat_b):
+                GameSimRecorded(strat_a, strat_b).play_game(record=False)
+        pool_sec = time.perf_counter() - start
+        stats = pool.stats()
+
+    print(f"In-process: {local_sec / matches * 1e3:.2f} ms/match, pool: {pool_sec / matches * 1e3:.2f} ms/match")
+    print(f"Round trips: {stats['round_trips']}, mean {stats['mean_round_trip_us']:.1f} us "
+          f"(IPC overhead {stats['mean_overhead_us']:.1f} us)")
@@ -1,11 +1,20 @@
 import firebase_admin
 from firebase_admin import firestore
-import pandas as pd
-import types
+import os
+import hashlib
 import itertools
+import threading
+import multiprocessing
+from datetime import datetime, timezone
 from dataclasses import dataclass, asdict
-from typing import Dict, List
-from sim import GameSimRecorded
+from typing import Dict, List, Optional, Tuple
+from sim import GameSimRecorded, TimeBudget
+from recorder import MoveLog
+from rules import compile_rules
+from match_store import code_hash, match_key, match_record
+from loader import load_strategy, StrategyRejected
+from match_rng import seat_rng, with_rng
+from coalescer import COLLECTION_TOURNAMENT_STATE
 
 # --- DATA STRUCTURES ---
 @dataclass
@@ -19,10 +28,88 @@ class StrategyStats:
     total_nodes: int
     matches: int
     team_name: str
+    errors: int = 0
+    overruns: int = 0
+    forfeits: int = 0
 
     def to_firestore(self) -> Dict:
         return asdict(self)
 
+class LeagueAborted(Exception):
+    """Raised when a run_league should_abort callback asks the league to stop."""
+
+@dataclass
+class MatchOutcome:
+    home: str
+    away: str
+    score_a: int
+    score_b: int
+    move_log: Optional[MoveLog] = None
+    error: Optional[str] = None
+    errors_a: int = 0
+    errors_b: int = 0
+    overruns_a: int = 0
+    overruns_b: int = 0
+    time_a: float = 0.0
+    time_b: float = 0.0
+    forfeits: Tuple[str, ...] = ()      # Strategies that forfeited instead of playing (see CircuitBreaker)
+
+    @property
+    def faulty(self) -> bool:
+        return bool(self.errors_a or self.errors_b or self.overruns_a or self.overruns_b)
+
+# --- STRATEGY BUDGETS ---
+# Per strategy call / per match (see sim.TimeBudget)
+LEAGUE_BUDGET = TimeBudget(
+    call_sec=float(os.getenv("STRATEGY_CALL_BUDGET_SEC", "0.05")),
+    match_sec=float(os.getenv("STRATEGY_MATCH_BUDGET_SEC", "2.0")),
+    hang_sec=float(os.getenv("STRATEGY_HANG_SEC", "1.0"))
+)
+# Per strategy over a whole league, before its remaining matches are forfeited
+MAX_STRATEGY_FAULTS = int(os.getenv("STRATEGY_MAX_FAULTS", "200"))
+MAX_STRATEGY_SEC = float(os.getenv("STRATEGY_MAX_SEC", "60"))
+
+class CircuitBreaker:
+    """
+    Tracks each strategy's errors + overruns and strategy time over the
+    matches of one league. Once a strategy exceeds max_faults or max_sec it
+    "trips": every later match involving it is forfeited instead of played.
+    """
+
+    def __init__(self, max_faults=MAX_STRATEGY_FAULTS, max_sec=MAX_STRATEGY_SEC):
+        self.max_faults = max_faults
+        self.max_sec = max_sec
+        self.faults: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+        self.tripped = set()
+        self.announce = True
+
+    def forfeits(self, home_name, away_name) -> Tuple[str, ...]:
+        return tuple(name for name in (home_name, away_name) if name in self.tripped)
+
+    def record(self, outcome: MatchOutcome) -> None:
+        for name, faults, secs in (
+            (outcome.home, outcome.errors_a + outcome.overruns_a, outcome.time_a),
+            (outcome.away, outcome.errors_b + outcome.overruns_b, outcome.time_b)
+        ):
+            total_faults = self.faults[name] = self.faults.get(name, 0) + faults
+            total_sec = self.seconds[name] = self.seconds.get(name, 0.0) + secs
+            if name not in self.tripped and (total_faults > self.max_faults or total_sec > self.max_sec):
+                self.tripped.add(name)
+                if self.announce:
+                    print(f"   [WARN] {name} exceeded its budget ({total_faults} errors/overruns, {total_sec:.1f}s), forfeiting its remaining matches.")
+
+    def check(self, outcome: MatchOutcome) -> MatchOutcome:
+        """The outcome as the league counts it: a forfeit if a side already tripped, else recorded."""
+        forfeits = self.forfeits(outcome.home, outcome.away)
+        if forfeits:
+            if outcome.forfeits == forfeits:
+                return outcome
+            return MatchOutcome(outcome.home, outcome.away, 0, 0, forfeits=forfeits)
+        if not outcome.forfeits:
+            self.record(outcome)
+        return outcome
+
 # --- FIREBASE SETUP ---
 def get_firestore_client():
     try:
@@ -33,14 +120,23 @@ def get_firestore_client():
 
 COLLECTION_Strategies = "strategies"
 COLLECTION_LEADERBOARD = "tos_leaderboard"
+LOAD_ERRORS_DOC = "load_errors"
 
 # --- HELPER FUNCTIONS ---
-def validate_signature(func):
+def _report_load_errors(db, errors: Dict[str, Dict]) -> None:
+    """
+    Stores why strategies were left out of the league in
+    tournament_state/load_errors (strategy id -> name, team, error). Kept
+    outside 'strategies': writes there would re-trigger the league.
+    """
+    ref = db.collection(COLLECTION_TOURNAMENT_STATE).document(LOAD_ERRORS_DOC)
     try:
-        code = func.__code__
-        return code.co_argcount == 4
-    except AttributeError:
-        return False
+        snap = ref.get()
+        if snap.exists and (snap.to_dict() or {}).get("errors") == errors:
+            return
+        ref.set({"errors": errors, "updatedAt": datetime.now(timezone.utc)})
+    except Exception as e:
+        print(f"   [WARN] Could not record load errors: {e}")
 
 def fetch_strategies_from_firestore():
     db = get_firestore_client()
@@ -48,6 +144,8 @@ def fetch_strategies_from_firestore():
     docs = strategies_ref.stream()
     
     strategies = []
+    rejected = []
+    load_errors = {}
     print(f"[INFO] Fetching strategies from Firestore ({COLLECTION_Strategies})...")
     
     count = 0
@@ -62,41 +160,302 @@ def fetch_strategies_from_firestore():
             continue
 
         try:
-            module_name = f"dynamic_strat_{strat_name}"
-            mod = types.ModuleType(module_name)
-            exec(source_code, mod.__dict__)
-            
-            found_func = None
-            if "strategy" in mod.__dict__ and callable(mod.strategy):
-                if validate_signature(mod.strategy):
-                    found_func = mod.strategy
-            
-            if not found_func:
-                for name, obj in mod.__dict__.items():
-                    if isinstance(obj, types.FunctionType):
-                        if validate_signature(obj) and name != "strategy":
-                            found_func = obj
-                            break
+            # Shares the compiled-code cache with the draft loaders
+            found_func, _ = load_strategy(source_code, strat_name)
             
             if found_func:
                 strategies.append({
                     "name": strat_name,
                     "func": found_func,
                     "id": doc.id,
-                    "team_name": team_name
+                    "team_name": team_name,
+                    "code": source_code,
+                    "code_hash": code_hash(source_code)
                 })
                 count += 1
                 print(f"   [OK] Loaded: {strat_name}")
             else:
                 print(f"   [SKIP] Skipped {strat_name}: No valid function.")
                 
+        except StrategyRejected as e:
+            # Locked in before the current screening rules; it is left out of the league
+            print(f"   [WARN] Rejected {strat_name} (team {team_name}): {e}")
+            rejected.append(strat_name)
+            load_errors[doc.id] = {"name": strat_name, "team_name": team_name, "error": f"Rejected before execution: {e}"}
         except Exception as e:
             print(f"   [ERR] Error loading {strat_name}: {e}")
-            
+            load_errors[doc.id] = {"name": strat_name, "team_name": team_name, "error": f"Execution/Syntax Error: {e}"}
+
+    _report_load_errors(db, load_errors)
+    if rejected:
+        print(f"[WARN] {len(rejected)} locked strategies fail screening and are excluded: {', '.join(rejected)}")
     print(f"[INFO] Loaded {count} strategies.")
     return strategies
 
-def run_league(competitors, draft = False):
+# --- MATCH EXECUTION ---
+def _seed_key(competitor):
+    """Explicit seed_key, else code hash when known, otherwise name."""
+    return competitor.get('seed_key') or competitor.get('code_hash') or competitor['name']
+
+def match_seed(home, away, seed=0):
+    """
+    Deterministic RNG seed for one match, derived from the two competitors
+    (see _seed_key) and the league seed. It does not depend on match order,
+    so any match can be replayed in isolation.
+    """
+    digest = hashlib.sha256(f"{seed}:{_seed_key(home)}:{_seed_key(away)}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+def seeded_pair(home, away, seed=0):
+    """
+    The two competitors' strategies, each bound to its own RNG for this match
+    (see match_rng.seat_rng). Strategies draw only from these, never from the
+    global random state, so matches can run in any order or in parallel.
+    """
+    base = match_seed(home, away, seed)
+    return (
+        with_rng(home['func'], seat_rng(base, 'A', _seed_key(home))),
+        with_rng(away['func'], seat_rng(base, 'B', _seed_key(away)))
+    )
+
+def play_match(home, away, seed=0, keep_log=False, budget=LEAGUE_BUDGET) -> MatchOutcome:
+    """
+    Plays a single league match. Under a budget, strategy errors and slow
+    (or interrupted, see sim.interruptible_call) calls become HARVEST moves
+    and are counted; anything else that fails is captured in `error`, not
+    raised.
+    """
+    try:
+        strat_a, strat_b = seeded_pair(home, away, seed)
+        sim = GameSimRecorded(strat_a, strat_b, budget=budget)
+        move_log = None
+        if keep_log:
+            move_log = sim.play_logged()
+            result = sim.result()
+        else:
+            result = sim.play_game(record=False)
+        return MatchOutcome(
+            home['name'], away['name'], result.score_a, result.score_b, move_log,
+            errors_a=result.errors_a, errors_b=result.errors_b,
+            overruns_a=result.overruns_a, overruns_b=result.overruns_b,
+            time_a=result.time_a, time_b=result.time_b
+        )
+    except Exception as e:
+        return MatchOutcome(home['name'], away['name'], 0, 0, error=str(e))
+
+def _play_or_forfeit(home, away, seed, keep_log, breaker) -> MatchOutcome:
+    if breaker is not None:
+        forfeits = breaker.forfeits(home['name'], away['name'])
+        if forfeits:
+            return MatchOutcome(home['name'], away['name'], 0, 0, forfeits=forfeits)
+    outcome = play_match(home, away, seed, keep_log)
+    return breaker.check(outcome) if breaker is not None else outcome
+
+# Competitors of the pool's workers: inherited when forked, loaded from
+# source by _init_worker under forkserver (set only while a pool is running)
+_fork_state = None
+
+def _worker_specs(competitors):
+    """Picklable competitors (source instead of function), or None if any has no 'code'."""
+    if not all(c.get('code') for c in competitors):
+        return None
+    return [{k: v for k, v in c.items() if k != 'func'} for c in competitors]
+
+def _init_worker(specs, seed, keep_log, breaker):
+    global _fork_state
+    competitors = []
+    for spec in specs:
+        # Same cached compile + screening as the parent's load (see loader); a
+        # failure must not raise here, or the pool would respawn workers forever
+        try:
+            func, _ = load_strategy(spec['code'], spec['name'])
+        except Exception as e:
+            print(f"   [ERR] Worker could not load {spec['name']}: {e}")
+            func = None
+        competitors.append(dict(spec, func=func))
+    _fork_state = (competitors, seed, keep_log, breaker)
+
+def start_league_server():
+    """
+    Starts the forkserver league workers are forked from. The server is a
+    fresh exec'd process, so its children never inherit gRPC threads of
+    this one; call it before the first Firestore use so it is up early.
+    Returns False where forkserver is unavailable.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return False
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload(["tournament"])
+    from multiprocessing import forkserver
+    forkserver.ensure_running()
+    return True
+
+def _play_chunk(pairs):
+    # Each worker trips its own copy of the breaker; run_matches re-checks in order
+    competitors, seed, keep_log, breaker = _fork_state
+    if breaker is not None:
+        breaker.announce = False
+    return [_play_or_forfeit(competitors[i], competitors[j], seed, keep_log, breaker) for i, j in pairs]
+
+def _cgroup_cpus():
+    """CPU quota of this container (cgroup v2, else v1), None when unlimited or unknown."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = f.read().strip()
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = f.read().strip()
+        except OSError:
+            return None
+    if quota in ("max", "-1"):
+        return None
+    try:
+        return max(1, int(int(quota) / int(period)))
+    except (ValueError, ZeroDivisionError):
+        return None
+
+def default_workers():
+    """
+    vCPUs allocated to this instance: the container's CPU quota (Cloud
+    Functions / Cloud Run), else the CPUs this process may run on. The
+    host's affinity mask alone overstates it under a quota.
+    """
+    quota = _cgroup_cpus()
+    try:
+        available = len(os.sched_getaffinity(0))
+    except AttributeError:
+        available = os.cpu_count() or 1
+    return min(quota, available) if quota else available
+
+def run_matches(competitors, seed=0, keep_log=False, workers=1, chunk_size=None, pairs=None, should_abort=None, breaker=None) -> List[MatchOutcome]:
+    """
+    Plays every ordered pairing (or only the given (home, away) index pairs)
+    and returns the outcomes in the same order.
+    With workers > 1 the matches are dispatched in chunks to a pool of worker
+    processes. When every competitor has its 'code', they are forked from
+    the forkserver (see start_league_server) and load the strategies from
+    source, so no worker is forked from a process with live gRPC threads.
+    Otherwise they are forked from this process and inherit the compiled
+    strategies copy-on-write. Falls back to serial play where neither is
+    available.
+    Hung strategy calls are only interrupted on a main thread (see
+    sim.TimeBudget), so when called from another thread matches go to the
+    forkserver pool even with one worker (if every competitor has 'code').
+    should_abort is polled between matches (between chunks when parallel)
+    and raises LeagueAborted once it returns True.
+    With a CircuitBreaker, matches of strategies that tripped it are
+    forfeited. Outcomes are checked against it in pairing order, so the
+    forfeits match a serial run (a worker only sees its own matches and
+    trips no earlier than the in-order check).
+    """
+    if pairs is None:
+        pairs = list(itertools.permutations(range(len(competitors)), 2))
+    methods = multiprocessing.get_all_start_methods()
+    specs = _worker_specs(competitors) if "forkserver" in methods else None
+    can_fork = specs is not None or "fork" in methods
+    isolate = specs is not None and bool(pairs) and threading.current_thread() is not threading.main_thread()
+
+    if not isolate and (workers <= 1 or len(pairs) < 2 or not can_fork):
+        if workers > 1 and not can_fork:
+            print("[WARN] fork is not available, running the league serially.")
+        outcomes = []
+        for i, j in pairs:
+            if should_abort is not None and should_abort():
+                raise LeagueAborted()
+            outcomes.append(_play_or_forfeit(competitors[i], competitors[j], seed, keep_log, breaker))
+        return outcomes
+
+    global _fork_state
+    workers = max(1, min(workers, len(pairs)))
+    if chunk_size is None:
+        chunk_size = max(1, len(pairs) // (workers * 4))
+    chunks = [pairs[k:k + chunk_size] for k in range(0, len(pairs), chunk_size)]
+
+    if specs is not None:
+        pool = multiprocessing.get_context("forkserver").Pool(
+            workers, initializer=_init_worker, initargs=(specs, seed, keep_log, breaker)
+        )
+    else:
+        _fork_state = (competitors, seed, keep_log, breaker)
+        pool = multiprocessing.get_context("fork").Pool(workers)
+    try:
+        with pool:
+            outcomes = []
+            # imap keeps chunk order, so the merge is identical to a serial run
+            for chunk_outcomes in pool.imap(_play_chunk, chunks):
+                if should_abort is not None and should_abort():
+                    pool.terminate()
+                    raise LeagueAborted()
+                outcomes.extend(chunk_outcomes)
+    finally:
+        _fork_state = None
+    if breaker is not None:
+        outcomes = [breaker.check(outcome) for outcome in outcomes]
+    return outcomes
+
+def _stored_key(home, away, rules_digest, seed):
+    if not home.get('code_hash') or not away.get('code_hash'):
+        return None
+    return match_key(home['code_hash'], away['code_hash'], rules_digest, seed)
+
+def run_matches_cached(competitors, store, seed=0, workers=1, should_abort=None, breaker=None) -> List[MatchOutcome]:
+    """
+    Like run_matches, but reuses results from a match store (see match_store)
+    keyed by both code hashes, the ruleset hash and the seed. Only matches
+    missing from the store are simulated, and only clean results (no
+    strategy errors, overruns or forfeits) are written back, so faulty
+    strategies are always re-checked. Stored results stand even for a
+    strategy that trips the breaker (they cost no time).
+    Competitors without a 'code_hash' are always simulated.
+    """
+    rules_digest = compile_rules().digest
+    pairs = list(itertools.permutations(range(len(competitors)), 2))
+    keys = [_stored_key(competitors[i], competitors[j], rules_digest, seed) for i, j in pairs]
+    stored = store.get_many(k for k in keys if k)
+
+    missing = [idx for idx, k in enumerate(keys) if k not in stored]
+    print(f"[INFO] Match store: {len(pairs) - len(missing)} reused, {len(missing)} to simulate.")
+    played = run_matches(
+        competitors, seed=seed, workers=workers,
+        pairs=[pairs[idx] for idx in missing], should_abort=should_abort, breaker=breaker
+    )
+
+    outcomes = [None] * len(pairs)
+    new_records = {}
+    for idx, outcome in zip(missing, played):
+        outcomes[idx] = outcome
+        home, away = competitors[pairs[idx][0]], competitors[pairs[idx][1]]
+        if keys[idx] and outcome.error is None and not outcome.forfeits and not outcome.faulty:
+            new_records[keys[idx]] = match_record(
+                home['code_hash'], away['code_hash'], rules_digest, seed, outcome.score_a, outcome.score_b
+            )
+    for idx, (i, j) in enumerate(pairs):
+        if outcomes[idx] is None:
+            record = stored[keys[idx]]
+            outcomes[idx] = MatchOutcome(competitors[i]['name'], competitors[j]['name'], record['score_a'], record['score_b'])
+
+    store.put_many(new_records)
+    return outcomes
+
+def run_league(competitors, draft = False, move_logs = None, workers = 1, seed = 0, store = None, should_abort = None):
+    """
+    Plays every ordered pairing once. If a dict is passed as move_logs, the
+    compact MoveLog of each match is kept under (home name, away name) so
+    games can be audited or replayed later (see sim.replay_game).
+    Standings do not depend on `workers`: every match gets its own seed
+    (see match_seed) and outcomes are merged in permutation order.
+    With a match store, previously played matches are reused instead of
+    simulated (ignored when move_logs are requested).
+    should_abort (see coalescer.Coalescer.abort_check) is polled during play
+    and before the leaderboard sync; LeagueAborted is raised if it fires.
+    Strategies play under LEAGUE_BUDGET: errors and overruns are counted per
+    strategy, and a strategy tripping the CircuitBreaker forfeits (loses)
+    its remaining matches. Overruns depend on machine speed, so only
+    error-free, in-budget leagues are fully reproducible.
+    """
     if len(competitors) < 2:
         print("[WARN] Not enough competitors.")
         return []
@@ -105,47 +464,75 @@ def run_league(competitors, draft = False):
     stats = {
         c['name']: {
             'points': 0, 'played': 0, 'won': 0, 'lost': 0, 'drawn': 0, 
-            'total_nodes': 0, 'team_name': c.get('team_name', 'Unknown')
+            'total_nodes': 0, 'team_name': c.get('team_name', 'Unknown'),
+            'errors': 0, 'overruns': 0, 'forfeits': 0
         } 
         for c in competitors
     }
 
-    matchups = list(itertools.permutations(competitors, 2))
-    print(f"[INFO] Starting League with {len(competitors)} strategies ({len(matchups)} matches)...")
+    match_count = len(competitors) * (len(competitors) - 1)
+    print(f"[INFO] Starting League with {len(competitors)} strategies ({match_count} matches, {workers} worker(s))...")
 
-    for home, away in matchups:
-        try:
-            sim = GameSimRecorded(home['func'], away['func'])
-            game_data = sim.play_game()
-            
-            final_round = game_data.iloc[-1]
-            
-            # Cast NumPy types to Python Ints
-            score_a = int(final_round['score_a'])
-            score_b = int(final_round['score_b'])
-            
-            stats[home['name']]['total_nodes'] += score_a
-            stats[away['name']]['total_nodes'] += score_b
-            
-            if score_a > score_b:
-                stats[home['name']]['points'] += 3
-                stats[home['name']]['won'] += 1
-                stats[away['name']]['lost'] += 1
-            elif score_b > score_a:
-                stats[away['name']]['points'] += 3
-                stats[away['name']]['won'] += 1
-                stats[home['name']]['lost'] += 1
-            else:
-                stats[home['name']]['points'] += 1
-                stats[away['name']]['points'] += 1
-                stats[home['name']]['drawn'] += 1
-                stats[away['name']]['drawn'] += 1
-            
-            stats[home['name']]['played'] += 1
-            stats[away['name']]['played'] += 1
-            
-        except Exception as e:
-            print(f"   [ERR] Match failed: {home['name']} vs {away['name']} - {e}")
+    breaker = CircuitBreaker()
+    if store is not None and move_logs is None:
+        outcomes = run_matches_cached(competitors, store, seed=seed, workers=workers, should_abort=should_abort, breaker=breaker)
+    else:
+        outcomes = run_matches(
+            competitors, seed=seed, keep_log=move_logs is not None,
+            workers=workers, should_abort=should_abort, breaker=breaker
+        )
+
+    for outcome in outcomes:
+        home_name, away_name = outcome.home, outcome.away
+        if outcome.error is not None:
+            print(f"   [ERR] Match failed: {home_name} vs {away_name} - {outcome.error}")
+            continue
+
+        if move_logs is not None:
+            move_logs[(home_name, away_name)] = outcome.move_log
+
+        stats[home_name]['played'] += 1
+        stats[away_name]['played'] += 1
+
+        if outcome.forfeits:
+            # Forfeiting side loses without nodes; the other side (if any) wins
+            for name in (home_name, away_name):
+                if name in outcome.forfeits:
+                    stats[name]['forfeits'] += 1
+                    stats[name]['lost'] += 1
+                else:
+                    stats[name]['points'] += 3
+                    stats[name]['won'] += 1
+            continue
+
+        stats[home_name]['errors'] += outcome.errors_a
+        stats[away_name]['errors'] += outcome.errors_b
+        stats[home_name]['overruns'] += outcome.overruns_a
+        stats[away_name]['overruns'] += outcome.overruns_b
+
+        score_a = outcome.score_a
+        score_b = outcome.score_b
+        
+        stats[home_name]['total_nodes'] += score_a
+        stats[away_name]['total_nodes'] += score_b
+        
+        if score_a > score_b:
+            stats[home_name]['points'] += 3
+            stats[home_name]['won'] += 1
+            stats[away_name]['lost'] += 1
+        elif score_b > score_a:
+            stats[away_name]['points'] += 3
+            stats[away_name]['won'] += 1
+            stats[home_name]['lost'] += 1
+        else:
+            stats[home_name]['points'] += 1
+            stats[away_name]['points'] += 1
+            stats[home_name]['drawn'] += 1
+            stats[away_name]['drawn'] += 1
+
+    for name, s in stats.items():
+        if s['errors'] or s['overruns'] or s['forfeits']:
+            print(f"   [WARN] {name}: {s['errors']} errors, {s['overruns']} overruns, {s['forfeits']} forfeits.")
 
     # --- RESULTS PROCESSING ---
     raw_results = []
@@ -158,7 +545,10 @@ def run_league(competitors, draft = False):
             "losses": s['lost'],
             "total_nodes": s['total_nodes'],
             "matches": s['played'],
-            "team_name": s['team_name']
+            "team_name": s['team_name'],
+            "errors": s['errors'],
+            "overruns": s['overruns'],
+            "forfeits": s['forfeits']
         })
 
     sorted_results = sorted(
@@ -171,6 +561,9 @@ def run_league(competitors, draft = False):
         return sorted_results
 
     # --- DATABASE SYNC (CLEANUP + UPLOAD) ---
+    if should_abort is not None and should_abort():
+        raise LeagueAborted()
+
     db = get_firestore_client()
     collection = db.collection(COLLECTION_LEADERBOARD)
     
@@ -207,7 +600,10 @@ def run_league(competitors, draft = False):
             losses=int(res['losses']),
             total_nodes=int(res['total_nodes']),
             matches=int(res['matches']),
-            team_name=str(res['team_name'])
+            team_name=str(res['team_name']),
+            errors=int(res['errors']),
+            overruns=int(res['overruns']),
+            forfeits=int(res['forfeits'])
         )
         
         doc_ref = collection.document(res['strategy'])
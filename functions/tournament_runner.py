@@ -1,6 +1,33 @@
+import os
 from firebase_functions import firestore_fn
 from firebase_admin import initialize_app
-from tournament import fetch_strategies_from_firestore, run_league
+from tournament import fetch_strategies_from_firestore, run_league, default_workers, get_firestore_client, LeagueAborted, start_league_server
+from match_store import FirestoreMatchStore, code_hash
+from coalescer import FirestoreCoalescer
+
+# Worker processes for the league, one per allocated vCPU (see main.py; override
+# with LEAGUE_WORKERS=1 to force serial play)
+LEAGUE_WORKERS = int(os.getenv("LEAGUE_WORKERS", default_workers()))
+
+# Quiet period a trigger waits for newer writes before running the league
+TOURNAMENT_DEBOUNCE_SEC = float(os.getenv("TOURNAMENT_DEBOUNCE_SEC", "30"))
+# Every this many triggers since the last finished league, one runs to completion even if superseded
+TOURNAMENT_MAX_PENDING = int(os.getenv("TOURNAMENT_MAX_PENDING", "10"))
+
+def _snapshot_code(snapshot):
+    if snapshot is None or not snapshot.exists:
+        return None
+    return (snapshot.to_dict() or {}).get("code")
+
+def stale_code_hashes(event):
+    """Code hash of the strategy version this event replaced or deleted."""
+    if event.data is None:
+        return set()
+    old_code = _snapshot_code(event.data.before)
+    new_code = _snapshot_code(event.data.after)
+    if not old_code or old_code == new_code:
+        return set()
+    return {code_hash(old_code)}
 
 # --- FUNCTION 1: TOURNAMENT TRIGGER (Background) ---
 # Triggers on Create, Update, or Delete in 'strategies' collection
@@ -8,12 +35,36 @@ def run_tournament(event: firestore_fn.Event[firestore_fn.Change[firestore_fn.Do
     """
     Automatic Tournament Runner:
     1. Listens for ANY change in the 'strategies' collection.
-    2. Fetches all active strategies.
-    3. Runs the league and updates the 'tos_leaderboard' collection.
+    2. Evicts stored matches of the replaced/deleted code version.
+    3. Coalesces bursts: waits for a quiet period and exits if a newer
+       trigger arrived meanwhile (that one will run the league instead),
+       unless the leaderboard has been deferred for TOURNAMENT_MAX_PENDING
+       triggers.
+    4. Fetches all active strategies.
+    5. Runs the league (reusing stored match results, so only matches
+       involving new code are simulated) and updates 'tos_leaderboard',
+       aborting if it gets superseded while running.
     """
     print(f"Triggered by change in strategies/{event.params['strat_id']}")
 
     try:
+        # Before any Firestore use: league workers fork from this server, never from a process with gRPC threads.
+        # Started even for one worker: off the main thread matches run in a worker so hung calls can be interrupted
+        start_league_server()
+        db = get_firestore_client()
+        store = FirestoreMatchStore(db)
+        stale = stale_code_hashes(event)
+        if stale:
+            print(f"[INFO] Evicted {store.evict(stale)} stored matches of replaced code.")
+
+        coalescer = FirestoreCoalescer(db, debounce_sec=TOURNAMENT_DEBOUNCE_SEC, max_pending=TOURNAMENT_MAX_PENDING)
+        generation = coalescer.begin()
+        if not coalescer.settle(generation):
+            print(f"[INFO] Trigger generation {generation} superseded by a newer change, skipping.")
+            return
+        if coalescer.forced:
+            print(f"[INFO] Trigger generation {generation}: leaderboard deferred for {TOURNAMENT_MAX_PENDING} changes, running to completion.")
+
         # 1. Fetch ALL strategies
         competitors = fetch_strategies_from_firestore()
         
@@ -24,9 +75,16 @@ def run_tournament(event: firestore_fn.Event[firestore_fn.Change[firestore_fn.Do
 
         # 3. Run League & Update DB
         # run_league now writes directly to Firestore and returns the list of stats
-        leaderboard = run_league(competitors)
+        leaderboard = run_league(
+            competitors, workers=LEAGUE_WORKERS, store=store,
+            should_abort=coalescer.abort_check(generation)
+        )
+        coalescer.finish(generation)
         
         print(f"[SUCCESS] Tournament completed. Leaderboard updated with {len(leaderboard)} entries.")
 
+    except LeagueAborted:
+        print(f"[INFO] Tournament generation {generation} superseded mid-run, aborted.")
+
     except Exception as e:
         print(f"[ERROR] Tournament failed: {e}")
@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import random
+import hashlib
+import argparse
+
+# Runs offline against the engine in ../functions (no emulator needed)
+FUNCTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions")
+sys.path.insert(0, FUNCTIONS_DIR)
+
+import strategies
+from sim import GameSimRecorded
+from batch_sim import BatchGameSim, vectorize
+
+# Per-round frame digests recorded with the original (dict-board) engine
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "equivalence_baseline.json")
+SEEDS = (0, 1, 2)
+
+BOTS = {
+    "random": strategies.strat_random,
+    "power_rush": strategies.strat_power_rush,
+    "hoarder": strategies.strat_hoarder,
+    "neighbor": strategies.strat_neighbor,
+    "sniper": strategies.strat_sniper,
+}
+# Bots that never draw from `random`, so any engine must reproduce them exactly
+DETERMINISTIC = ("hoarder", "neighbor", "sniper")
+
+def frame_digest(strat_a, strat_b, seed):
+    """SHA-256 of the full per-round DataFrame of one game, seeded like the original engine."""
+    random.seed(seed)
+    frame = GameSimRecorded(strat_a, strat_b).play_game()
+    return hashlib.sha256(frame.to_csv(index=False).encode()).hexdigest()
+
+def frame_digests():
+    return {
+        f"{a}:{b}:{seed}": frame_digest(BOTS[a], BOTS[b], seed)
+        for a in BOTS for b in BOTS for seed in SEEDS
+    }
+
+def test_engine_frames():
+    """Per-round frames of every built-in pairing match the baseline engine bit for bit."""
+    with open(BASELINE_FILE, encoding="utf-8") as f:
+        baseline = json.load(f)
+    current = frame_digests()
+    mismatches = [key for key, digest in baseline.items() if current.get(key) != digest]
+    for key in mismatches:
+        print(f"   [FAIL] Frame differs from baseline: {key}")
+    return not mismatches
+
+def test_batch_matches_scalar(games=4):
+    """BatchGameSim (vectorized bots and the ScalarStrategy adapter) reproduces GameSimRecorded."""
+    ok = True
+    for a in DETERMINISTIC:
+        for b in DETERMINISTIC:
+            scalar = GameSimRecorded(BOTS[a], BOTS[b]).play_game(record=False)
+            expected = (scalar.score_a, scalar.score_b, scalar.energy_a, scalar.energy_b, scalar.invalid_a, scalar.invalid_b)
+            for label, strat_a, strat_b in (
+                ("vectorized", vectorize(BOTS[a]), vectorize(BOTS[b])),
+                ("scalar adapter", lambda *args: BOTS[a](*args), lambda *args: BOTS[b](*args)),
+            ):
+                batch = BatchGameSim(strat_a, strat_b, games, seed=0).play()
+                for g in range(games):
+                    got = (batch.score_a[g], batch.score_b[g], batch.energy_a[g], batch.energy_b[g], batch.invalid_a[g], batch.invalid_b[g])
+                    if tuple(int(v) for v in got) != expected:
+                        print(f"   [FAIL] Batch ({label}) {a} vs {b}, game {g}: {got} != {expected}")
+                        ok = False
+    return ok
+
+def test_parallel_league(workers=2):
+    """League standings are identical for serial and forked play."""
+    from tournament import run_league
+
+    competitors = [{"name": name, "func": func, "team_name": "System"} for name, func in BOTS.items()]
+    serial = run_league(competitors, draft=True, workers=1)
+    forked = run_league(competitors, draft=True, workers=workers)
+    if serial != forked:
+        print(f"   [FAIL] Standings differ:\n   serial: {serial}\n   forked: {forked}")
+        return False
+    return True
+
+def write_baseline():
+    with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+        json.dump(frame_digests(), f, indent=1, sort_keys=True)
+    print(f"Wrote {BASELINE_FILE}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checks that engine optimisations still reproduce the original results.")
+    parser.add_argument("--write-baseline", action="store_true",
+                        help="Re-record the frame digests (only after an intended rules change).")
+    args = parser.parse_args()
+
+    if args.write_baseline:
+        write_baseline()
+        sys.exit(0)
+
+    failed = []
+    for test in (test_engine_frames, test_batch_matches_scalar, test_parallel_league):
+        print(f"Running {test.__name__}...")
+        if test():
+            print("   OK")
+        else:
+            failed.append(test.__name__)
+
+    if failed:
+        print(f"\nFAILED: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nSUCCESS: all equivalence checks passed.")